@@ -0,0 +1,369 @@
+"""
+go_playout.py
+
+Fast random playouts for the game of Go.
+
+PlayoutBoard copies the stones of a SimpleGoBoard into plain python lists
+and keeps incremental structures while the playout runs:
+- a list of empty points with an index map, so random selection and
+  removal of a point are O(1)
+- a block representative for every stone, with the stones and the set of
+  liberties of each block, so captures and atari checks never flood fill
+
+The playout policy is random with an optional fill-eye filter,
+and can give priority to capturing an opponent block in atari
+and to escaping from atari next to the last move.
+Games are played until two consecutive passes and scored by area.
+"""
+
+import random
+from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, PASS
+
+class PlayoutBoard(object):
+
+    def __init__(self, goboard, color=None):
+        """
+        Copy the position of goboard.
+
+        Arguments
+        ---------
+        goboard: SimpleGoBoard
+            board in the padded 1-d representation
+        color: BLACK, WHITE
+            the color to play, defaults to goboard.current_player
+        """
+        self.size = goboard.size
+        self.NS = goboard.NS
+        self.board = [int(c) for c in goboard.board]
+        self.current_player = goboard.current_player if color is None else color
+        self.ko_recapture = getattr(goboard, "ko_recapture", None)
+        self.last_move = None
+        self._initialize_neighbors()
+        self._initialize_empty_points()
+        self._initialize_blocks()
+
+    def _initialize_neighbors(self):
+        """
+        precompute on-board neighbors and diagonal neighbors of every point
+        """
+        board = self.board
+        maxpoint = len(board)
+        self.neighbors = []
+        self.diag_neighbors = []
+        for point in range(maxpoint):
+            if board[point] == BORDER:
+                self.neighbors.append([])
+                self.diag_neighbors.append([])
+                continue
+            nbs = [point - 1, point + 1, point - self.NS, point + self.NS]
+            diags = [point - self.NS - 1, point - self.NS + 1,
+                     point + self.NS - 1, point + self.NS + 1]
+            self.neighbors.append([nb for nb in nbs
+                                   if 0 <= nb < maxpoint and board[nb] != BORDER])
+            self.diag_neighbors.append([d for d in diags if 0 <= d < maxpoint])
+
+    def _initialize_empty_points(self):
+        self.empty_points = []
+        self.empty_index = [-1] * len(self.board)
+        for point, color in enumerate(self.board):
+            if color == EMPTY:
+                self.empty_index[point] = len(self.empty_points)
+                self.empty_points.append(point)
+
+    def _initialize_blocks(self):
+        """
+        Label the blocks of the starting position
+        and compute their stones and liberties.
+        """
+        self.block_of = [None] * len(self.board)
+        self.block_stones = {}
+        self.block_liberties = {}
+        for point, color in enumerate(self.board):
+            if color not in (BLACK, WHITE) or self.block_of[point] is not None:
+                continue
+            stones = [point]
+            liberties = set()
+            self.block_of[point] = point
+            pointstack = [point]
+            while pointstack:
+                p = pointstack.pop()
+                for nb in self.neighbors[p]:
+                    nb_color = self.board[nb]
+                    if nb_color == EMPTY:
+                        liberties.add(nb)
+                    elif nb_color == color and self.block_of[nb] is None:
+                        self.block_of[nb] = point
+                        stones.append(nb)
+                        pointstack.append(nb)
+            self.block_stones[point] = stones
+            self.block_liberties[point] = liberties
+
+    def _add_empty(self, point):
+        self.empty_index[point] = len(self.empty_points)
+        self.empty_points.append(point)
+
+    def _remove_empty(self, point):
+        i = self.empty_index[point]
+        last = self.empty_points.pop()
+        if last != point:
+            self.empty_points[i] = last
+            self.empty_index[last] = i
+        self.empty_index[point] = -1
+
+    def _swap_empty(self, i, j):
+        """ Swap positions i and j in the empty point list """
+        points = self.empty_points
+        points[i], points[j] = points[j], points[i]
+        self.empty_index[points[i]] = i
+        self.empty_index[points[j]] = j
+
+    def is_eye(self, point, color):
+        """
+        Check if point is a simple eye for color
+        """
+        for nb in self.neighbors[point]:
+            if self.board[nb] != color:
+                return False
+        opp_color = GoBoardUtil.opponent(color)
+        false_count = 0
+        at_edge = 0
+        for d in self.diag_neighbors[point]:
+            if self.board[d] == BORDER:
+                at_edge = 1
+            elif self.board[d] == opp_color:
+                false_count += 1
+        return false_count <= 1 - at_edge # 0 at edge, 1 in center
+
+    def is_legal(self, point, color):
+        """
+        Check whether it is legal for color to play on the empty point.
+        Uses the liberty counts of the neighboring blocks only.
+        """
+        if point == PASS:
+            return True
+        if self.board[point] != EMPTY or point == self.ko_recapture:
+            return False
+        for nb in self.neighbors[point]:
+            nb_color = self.board[nb]
+            if nb_color == EMPTY:
+                return True
+            libs = len(self.block_liberties[self.block_of[nb]])
+            if nb_color == color:
+                if libs > 1:
+                    return True
+            elif libs == 1:
+                return True # captures
+        return False
+
+    def play_move(self, point, color):
+        """
+        Play a legal move of color on point and update
+        empty points, blocks, liberties and the ko point.
+        """
+        self.last_move = point
+        self.current_player = GoBoardUtil.opponent(color)
+        if point == PASS:
+            self.ko_recapture = None
+            return
+        board = self.board
+        board[point] = color
+        self._remove_empty(point)
+        block = point
+        self.block_of[point] = point
+        self.block_stones[point] = [point]
+        self.block_liberties[point] = set()
+        captured = []
+        for nb in self.neighbors[point]:
+            nb_color = board[nb]
+            if nb_color == EMPTY:
+                self.block_liberties[block].add(nb)
+            elif nb_color == color:
+                if self.block_of[nb] != block:
+                    block = self._merge_blocks(block, self.block_of[nb])
+            else:
+                opp_block = self.block_of[nb]
+                opp_libs = self.block_liberties[opp_block]
+                opp_libs.discard(point)
+                if not opp_libs:
+                    captured.extend(self._remove_block(opp_block, color))
+        self.block_liberties[block].discard(point)
+        self.ko_recapture = None
+        if len(captured) == 1 and len(self.block_stones[block]) == 1 \
+                and len(self.block_liberties[block]) == 1:
+            self.ko_recapture = captured[0]
+
+    def _merge_blocks(self, b1, b2):
+        """ Merge the smaller of two blocks into the larger one """
+        if len(self.block_stones[b1]) < len(self.block_stones[b2]):
+            b1, b2 = b2, b1
+        for stone in self.block_stones[b2]:
+            self.block_of[stone] = b1
+        self.block_stones[b1].extend(self.block_stones.pop(b2))
+        self.block_liberties[b1] |= self.block_liberties.pop(b2)
+        return b1
+
+    def _remove_block(self, block, capturing_color):
+        """
+        Remove a captured block and give its points as liberties
+        to the neighboring blocks of capturing_color.
+        """
+        stones = self.block_stones.pop(block)
+        del self.block_liberties[block]
+        for stone in stones:
+            self.board[stone] = EMPTY
+            self.block_of[stone] = None
+            self._add_empty(stone)
+        for stone in stones:
+            for nb in self.neighbors[stone]:
+                if self.board[nb] == capturing_color:
+                    self.block_liberties[self.block_of[nb]].add(stone)
+        return stones
+
+    def _atari_capture_moves(self, color):
+        """
+        Moves that capture an opponent block in atari
+        next to the last move.
+        """
+        moves = []
+        last = self.last_move
+        if last is None:
+            return moves
+        opp_color = GoBoardUtil.opponent(color)
+        blocks = set()
+        if self.board[last] == opp_color:
+            blocks.add(self.block_of[last])
+        for nb in self.neighbors[last]:
+            if self.board[nb] == opp_color:
+                blocks.add(self.block_of[nb])
+        for block in blocks:
+            libs = self.block_liberties[block]
+            if len(libs) == 1:
+                lib = next(iter(libs))
+                if self.is_legal(lib, color):
+                    moves.append(lib)
+        return moves
+
+    def _atari_escape_moves(self, color):
+        """
+        Moves that extend an own block put into atari by the last move,
+        if the extended block has more than one liberty.
+        """
+        moves = []
+        last = self.last_move
+        if last is None:
+            return moves
+        blocks = set()
+        for nb in self.neighbors[last]:
+            if self.board[nb] == color:
+                blocks.add(self.block_of[nb])
+        for block in blocks:
+            libs = self.block_liberties[block]
+            if len(libs) != 1:
+                continue
+            lib = next(iter(libs))
+            new_libs = set()
+            for nb in self.neighbors[lib]:
+                if self.board[nb] == EMPTY:
+                    new_libs.add(nb)
+                elif self.board[nb] == color and self.block_of[nb] != block:
+                    new_libs |= self.block_liberties[self.block_of[nb]]
+            new_libs.discard(lib)
+            if len(new_libs) > 1 and self.is_legal(lib, color):
+                moves.append(lib)
+        return moves
+
+    def generate_move(self, color, use_eye_filter=True,
+                      atari_capture=False, atari_escape=False):
+        """
+        Generate a playout move for color.
+        Return PASS if no move found
+        """
+        if atari_capture:
+            moves = self._atari_capture_moves(color)
+            if moves:
+                return random.choice(moves)
+        if atari_escape:
+            moves = self._atari_escape_moves(color)
+            if moves:
+                return random.choice(moves)
+        # Try random empty points; rejected points are swapped
+        # behind the candidate range instead of being removed
+        n = len(self.empty_points)
+        while n > 0:
+            i = random.randrange(n)
+            point = self.empty_points[i]
+            if not (use_eye_filter and self.is_eye(point, color)) \
+                    and self.is_legal(point, color):
+                return point
+            n -= 1
+            self._swap_empty(i, n)
+        return PASS
+
+    def play_game(self, use_eye_filter=True, atari_capture=False,
+                  atari_escape=False, max_moves=None):
+        """
+        Play until two consecutive passes or max_moves moves.
+        Returns the number of moves played.
+        """
+        if max_moves is None:
+            max_moves = 3 * self.size * self.size
+        passes = 0
+        num_moves = 0
+        while passes < 2 and num_moves < max_moves:
+            color = self.current_player
+            move = self.generate_move(color, use_eye_filter,
+                                      atari_capture, atari_escape)
+            self.play_move(move, color)
+            passes = passes + 1 if move == PASS else 0
+            num_moves += 1
+        return num_moves
+
+    def area_score(self, komi=0):
+        """
+        Area score from black's point of view:
+        stones plus empty regions surrounded by one color only, minus komi.
+        """
+        board = self.board
+        score = -komi
+        marked = [False] * len(board)
+        for point, color in enumerate(board):
+            if color == BLACK:
+                score += 1
+            elif color == WHITE:
+                score -= 1
+            elif color == EMPTY and not marked[point]:
+                region_size = 0
+                borders = set()
+                marked[point] = True
+                pointstack = [point]
+                while pointstack:
+                    p = pointstack.pop()
+                    region_size += 1
+                    for nb in self.neighbors[p]:
+                        nb_color = board[nb]
+                        if nb_color == EMPTY:
+                            if not marked[nb]:
+                                marked[nb] = True
+                                pointstack.append(nb)
+                        else:
+                            borders.add(nb_color)
+                if borders == {BLACK}:
+                    score += region_size
+                elif borders == {WHITE}:
+                    score -= region_size
+        return score
+
+    def winner(self, komi=0):
+        """ Return the winner by area score. A tie counts as a white win """
+        return BLACK if self.area_score(komi) > 0 else WHITE
+
+def playout(goboard, color=None, komi=6.5, use_eye_filter=True,
+            atari_capture=False, atari_escape=False, max_moves=None):
+    """
+    Play one game from the position of goboard to two passes.
+    goboard is not modified.
+    Returns the winner, BLACK or WHITE.
+    """
+    board = PlayoutBoard(goboard, color)
+    board.play_game(use_eye_filter, atari_capture, atari_escape, max_moves)
+    return board.winner(komi)
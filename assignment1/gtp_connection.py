@@ -7,6 +7,7 @@ in the Deep-Go project by Isaac Henrion and Amos Storkey
 at the University of Edinburgh.
 """
 import traceback
+from profiler import CommandProfiler
 import re
 from sys import stdin, stdout, stderr
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, PASS, \
@@ -56,8 +57,12 @@ class GtpConnection():
             "gogui-rules_side_to_move": self.gogui_rules_side_to_move_cmd,
             "gogui-rules_board": self.gogui_rules_board_cmd,
             "gogui-rules_final_result": self.gogui_rules_final_result_cmd,
-            "gogui-analyze_commands": self.gogui_analyze_cmd
+            "gogui-analyze_commands": self.gogui_analyze_cmd,
+            "profile": self.profile_cmd,
+            "profile_summary": self.profile_summary_cmd
         }
+        self.profiler = CommandProfiler.from_environment()
+        self.profiled_commands = {"genmove", "solve"}
 
         # used for argument checking
         # values: (required number of arguments, 
@@ -107,7 +112,10 @@ class GtpConnection():
             return
         if command_name in self.commands:
             try:
-                self.commands[command_name](args)
+                if self.profiler.enabled and command_name in self.profiled_commands:
+                    self.profiler.run(command_name, self.commands[command_name], args)
+                else:
+                    self.commands[command_name](args)
             except Exception as e:
                 self.debug_msg("Error executing command {}\n".format(str(e)))
                 self.debug_msg("Stack Trace:\n{}\n".
@@ -118,6 +126,38 @@ class GtpConnection():
             self.error('Unknown command')
             stdout.flush()
 
+    def profile_cmd(self, args):
+        """
+        profile on [DIR]: profile genmove and solve, writing to DIR
+        profile off: stop profiling
+        """
+        if not args or args[0].lower() not in ("on", "off") or len(args) > 2:
+            self.error('Usage: profile {on [DIR],off}')
+            return
+        if args[0].lower() == "on":
+            self.profiler.enable(args[1] if len(args) == 2 else None)
+            self.respond(self.profiler.directory)
+        else:
+            self.profiler.disable()
+            self.respond()
+
+    def profile_summary_cmd(self, args):
+        """
+        profile_summary [N] [TOP]: the TOP functions with the most own time
+        over the last N profiled commands
+        """
+        try:
+            last = int(args[0]) if len(args) > 0 else 10
+            top = int(args[1]) if len(args) > 1 else 15
+        except ValueError:
+            self.error('Usage: profile_summary [N] [TOP]')
+            return
+        lines = self.profiler.summary(last, top)
+        if not lines:
+            self.respond("no profiles")
+            return
+        self.respond('\n' + '\n'.join(lines))
+
     def has_arg_error(self, cmd, argnum):
         """
         Verify the number of arguments of cmd.
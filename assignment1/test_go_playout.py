@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+from board_util import BLACK, WHITE, EMPTY, PASS
+from simple_board import SimpleGoBoard
+from go_playout import PlayoutBoard, playout
+
+class PlayoutBoardTestCase(unittest.TestCase):
+    """Tests for go_playout.py"""
+
+    def test_capture(self):
+        goboard = SimpleGoBoard(3)
+        board = PlayoutBoard(goboard)
+        board.play_move(goboard.pt(1,1), WHITE)
+        board.play_move(goboard.pt(1,2), BLACK)
+        self.assertEqual(board._atari_capture_moves(BLACK), [goboard.pt(2,1)])
+        board.play_move(goboard.pt(2,1), BLACK)
+        self.assertEqual(board.board[goboard.pt(1,1)], EMPTY)
+        self.assertIn(goboard.pt(1,1), board.empty_points)
+        self.assertEqual(len(board.empty_points), 7)
+
+    def test_suicide_is_illegal(self):
+        goboard = SimpleGoBoard(3)
+        board = PlayoutBoard(goboard)
+        board.play_move(goboard.pt(1,2), BLACK)
+        board.play_move(goboard.pt(2,1), BLACK)
+        self.assertFalse(board.is_legal(goboard.pt(1,1), WHITE))
+        self.assertTrue(board.is_legal(goboard.pt(1,1), BLACK))
+
+    def test_ko(self):
+        goboard = SimpleGoBoard(4)
+        board = PlayoutBoard(goboard)
+        for row, col, color in [(1,2,BLACK), (2,1,BLACK), (3,2,BLACK),
+                                (1,3,WHITE), (2,4,WHITE), (3,3,WHITE),
+                                (2,3,BLACK)]:
+            board.play_move(goboard.pt(row, col), color)
+        board.play_move(goboard.pt(2,2), WHITE)
+        self.assertEqual(board.ko_recapture, goboard.pt(2,3))
+        self.assertFalse(board.is_legal(goboard.pt(2,3), BLACK))
+
+    def test_eye_filter(self):
+        goboard = SimpleGoBoard(2)
+        board = PlayoutBoard(goboard)
+        board.play_move(goboard.pt(1,2), BLACK)
+        board.play_move(goboard.pt(2,1), BLACK)
+        board.play_move(goboard.pt(2,2), BLACK)
+        self.assertTrue(board.is_eye(goboard.pt(1,1), BLACK))
+        self.assertEqual(board.generate_move(BLACK), PASS)
+
+    def test_area_score(self):
+        goboard = SimpleGoBoard(3)
+        board = PlayoutBoard(goboard)
+        self.assertEqual(board.area_score(komi = 0.5), -0.5)
+        board.play_move(goboard.pt(2,2), BLACK)
+        self.assertEqual(board.area_score(), 9)
+
+    def test_playout_to_two_passes(self):
+        goboard = SimpleGoBoard(7)
+        board = PlayoutBoard(goboard)
+        num_moves = board.play_game(atari_capture = True, atari_escape = True)
+        self.assertLess(num_moves, 3 * 7 * 7)
+        self.assertEqual(board.last_move, PASS)
+        self.assertIn(playout(goboard), [BLACK, WHITE])
+        self.assertTrue((goboard.board != BLACK).all())
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
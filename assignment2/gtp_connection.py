@@ -14,6 +14,7 @@ from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, PASS, \
                        MAXSIZE, coord_to_point
 import numpy as np
 import re
+import search_stats
 
 class TimeoutException(Exception): pass
 
@@ -49,6 +50,7 @@ class GtpConnection():
         self.go_engine = go_engine
         self.board = board
         self.limit = 1
+        self._search_log = False
         self.commands = {
             "mo": self.moveOrdering,
             "solve": self.solve_cmd,
@@ -72,7 +74,9 @@ class GtpConnection():
             "gogui-rules_side_to_move": self.gogui_rules_side_to_move_cmd,
             "gogui-rules_board": self.gogui_rules_board_cmd,
             "gogui-rules_final_result": self.gogui_rules_final_result_cmd,
-            "gogui-analyze_commands": self.gogui_analyze_cmd
+            "gogui-analyze_commands": self.gogui_analyze_cmd,
+            "search_stats": self.search_stats_cmd,
+            "search_stats_mode": self.search_stats_mode_cmd
         }
 
         # used for argument checking
@@ -85,7 +89,8 @@ class GtpConnection():
             "genmove": (1, 'Usage: genmove {w,b}'),
             "play": (2, 'Usage: play {b,w} MOVE'),
             "legal_moves": (1, 'Usage: legal_moves {w,b}'),
-            "timelimit": (1, 'Usage: timelimit inSecond')
+            "timelimit": (1, 'Usage: timelimit inSecond'),
+            "search_stats_mode": (1, 'Usage: search_stats_mode {off,on,log}')
         }
     
     def write(self, data):
@@ -197,12 +202,15 @@ class GtpConnection():
         self.drawMove = [""]
         #self.Search(self.board)
         current_board = self.board.copy()
+        stats = self.begin_search()
         try:
             with time_limit(int(self.limit)):
                 self.Search(self.board)
         except TimeoutException as e:
             self.respond("unknown")
             self.board = current_board         
+        finally:
+            self.end_search("solve", stats)
         # result = self.run_with_limited_time(self.Search(self.board))
         # if result == False:
         #     # this means that after timeout 
@@ -244,12 +252,15 @@ class GtpConnection():
             if whocall == "solve_cmd":
                 self.respond("%s %s"%(winners[me-1], str(self.winningMove[0])))
 
-    def negamaxBoolean(self, state):
+    def negamaxBoolean(self, state, depth=1):
         """
          1: win
         -1: lose
          0: draw
         """
+        stats = search_stats.current
+        if stats is not None:
+            stats.node(depth)
         # end game with one of the player win first
         endGame, winner = state.check_game_end_gomoku() 
         if endGame:
@@ -270,12 +281,16 @@ class GtpConnection():
         all_possible_move = state.ScanBoard(allPossibleMove)
         if len(all_possible_move) == 0:
             return -1
+        if stats is not None:
+            stats.expand()
         drawBest = False # flag to indicate over all possible move the best possible result will be draw result
-        for m in all_possible_move:
+        for i, m in enumerate(all_possible_move):
             state.play_move_gomoku(m,state.current_player)
-            success = -self.negamaxBoolean(state)
+            success = -self.negamaxBoolean(state, depth + 1)
             state.undoMove()
             if success == 1:
+                if stats is not None:
+                    stats.cutoff(i)
                 move_coord = point_to_coord(m, state.size)
                 move_as_string = format_point(move_coord)
                 self.winningMove[0] = move_as_string
@@ -320,7 +335,44 @@ class GtpConnection():
         self.limit = args[0]
         self.respond("")
 
-    
+    def search_stats_mode_cmd(self, args):
+        """
+        off: no statistics, on: collect statistics for search_stats,
+        log: also write them to stderr after every genmove and solve
+        """
+        mode = args[0].lower()
+        if mode not in ("off", "on", "log"):
+            self.error('Usage: search_stats_mode {off,on,log}')
+            return
+        if mode == "off":
+            search_stats.disable()
+        else:
+            search_stats.enable()
+        self._search_log = (mode == "log")
+        self.respond()
+
+    def search_stats_cmd(self, args):
+        """ Statistics of the last genmove or solve """
+        stats = search_stats.current
+        if stats is None:
+            self.respond("disabled")
+            return
+        self.respond(stats.format())
+
+    def begin_search(self):
+        stats = search_stats.current
+        if stats is not None:
+            stats.reset()
+        return stats
+
+    def end_search(self, name, stats):
+        if stats is None:
+            return
+        stats.stop()
+        if self._search_log:
+            stderr.write("{}: {}\n".format(name, stats.format(' ')))
+            stderr.flush()
+
 
     def protocol_version_cmd(self, args):
         """ Return the GTP protocol version being used (always 2) """
@@ -438,6 +490,7 @@ class GtpConnection():
         current_board = self.board.copy()
 
         # if not end game yet, call search to find best move to go
+        stats = self.begin_search()
         try:
             with time_limit(int(self.limit)):
                 #print("start search")
@@ -462,6 +515,8 @@ class GtpConnection():
             move_as_string = format_point(move_coord)
             self.respond(move_as_string)
             return 
+        finally:
+            self.end_search("genmove", stats)
                 
                 
         if self.FinalWinner == board_color: #use solver to find best move#
@@ -632,6 +687,7 @@ class GtpConnection():
                      "pstring/Board Size/gogui-rules_board_size\n"
                      "pstring/Rules GameID/gogui-rules_game_id\n"
                      "pstring/Show Board/gogui-rules_board\n"
+                     "pstring/Search Statistics/search_stats\n"
                      )
 
 def point_to_coord(point, boardsize):
@@ -0,0 +1,106 @@
+"""
+search_stats.py
+
+Counters for the search of one genmove or solve command.
+
+The searches only touch the counters through the module variable
+`current`, which is None unless statistics are enabled,
+so the cost of a disabled hook is a single global lookup.
+Playouts after stop() are not counted: they come from pondering on the
+opponent's time, which is not part of the search of the last command.
+"""
+
+import time
+
+current = None
+
+def enable():
+    """ Start collecting statistics, returns the SearchStats object """
+    global current
+    if current is None:
+        current = SearchStats()
+    return current
+
+def disable():
+    global current
+    current = None
+
+class SearchStats(object):
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.start_time = time.time()
+        self.end_time = None
+        self.nodes = 0
+        self.max_depth = 0
+        self.expanded = 0
+        self.cutoffs = 0
+        self.cutoffs_by_index = {}
+        self.playouts = 0
+        self.playout_moves = 0
+
+    def node(self, depth):
+        """ A node at depth was visited """
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def expand(self):
+        """ A node started to search its moves """
+        self.expanded += 1
+
+    def cutoff(self, move_index):
+        """ A beta cutoff by the move_index-th move of a node """
+        self.cutoffs += 1
+        self.cutoffs_by_index[move_index] = self.cutoffs_by_index.get(move_index, 0) + 1
+
+    def playout(self, length):
+        """ A playout of length moves finished """
+        if self.end_time is not None:
+            return
+        self.playouts += 1
+        self.playout_moves += length
+
+    def add(self, other):
+        """ Add the counters of other, a search run in another process """
+        self.nodes += other.nodes
+        self.max_depth = max(self.max_depth, other.max_depth)
+        self.expanded += other.expanded
+        self.cutoffs += other.cutoffs
+        for i, n in other.cutoffs_by_index.items():
+            self.cutoffs_by_index[i] = self.cutoffs_by_index.get(i, 0) + n
+        self.playouts += other.playouts
+        self.playout_moves += other.playout_moves
+
+    def stop(self):
+        self.end_time = time.time()
+
+    def elapsed(self):
+        end = self.end_time if self.end_time is not None else time.time()
+        return end - self.start_time
+
+    def summary(self):
+        """ Return the statistics as a list of (name, value) pairs """
+        elapsed = self.elapsed()
+        items = [("time", "{:.3f}".format(elapsed)),
+                 ("nodes", self.nodes),
+                 ("nps", "{:.0f}".format(self.nodes / elapsed if elapsed > 0 else 0)),
+                 ("max_depth", self.max_depth)]
+        if self.expanded:
+            items.append(("cutoff_rate", "{:.3f}".format(self.cutoffs / self.expanded)))
+        if self.cutoffs:
+            by_index = ["{}:{:.3f}".format(i, n / self.cutoffs)
+                        for i, n in sorted(self.cutoffs_by_index.items())]
+            items.append(("cutoffs_by_index", ','.join(by_index)))
+        if self.playouts:
+            items.append(("playouts", self.playouts))
+            items.append(("playouts_per_sec", "{:.0f}".format(self.playouts / elapsed
+                                                               if elapsed > 0 else 0)))
+            items.append(("avg_playout_length",
+                          "{:.1f}".format(self.playout_moves / self.playouts)))
+        return items
+
+    def format(self, separator='\n'):
+        return separator.join("{} {}".format(name, value) for name, value in self.summary())
@@ -13,6 +13,7 @@ import numpy as np
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, \
                        PASS, is_black_white, coord_to_point, where1d, \
                        MAXSIZE, NULLPOINT
+from scan_scores import score_moves
 
 class SimpleGoBoard(object):
 
@@ -670,39 +671,33 @@ class SimpleGoBoard(object):
         -attack
         -defend
         then sort the moves list according to the score
+        The scores of all moves are computed at once by scan_scores.score_moves,
+        evaluate_move_on_attack and evaluate_move_on_defend score a single move.
         """
-        possibleMovesWithScore = []
-        for m in possibleMoves:
-            possibleMovesWithScore.append([m,0])
-        # attack evaluation
-        for index,move in enumerate(possibleMovesWithScore):
-            # move[0]: move position  
-            score = self.evaluate_move_on_attack(move[0])
-            possibleMovesWithScore[index][1] += score
-            if score >= 100000:
-                # check first
-                # if we have 5-connect after the move and about to win 
-                possibleMoves[index] = possibleMoves[0]
-                possibleMoves[0] = move[0]
-                return possibleMoves
+        if len(possibleMoves) == 0:
+            return possibleMoves
+        attack, defend = score_moves(self, possibleMoves)
+        winning = where1d(attack >= 100000)
+        if len(winning) > 0:
+            # check first
+            # if we have 5-connect after the move and about to win 
+            index = winning[0]
+            move = possibleMoves[index]
+            possibleMoves[index] = possibleMoves[0]
+            possibleMoves[0] = move
+            return possibleMoves
         # check if opponent win immediately
         if self.check_if_opponent_has_immediate_win():
             # prune this search because this will lead to lose
             # print("check")
             possibleMoves = []
             return possibleMoves
-        
 
-        # defense evaluation
-        for index,move in enumerate(possibleMovesWithScore):
-        #     # move[0]: move position
-            score = self.evaluate_move_on_defend(move[0])
-            possibleMovesWithScore[index][1] += score
-        
-        # sort the possible move list according to the score
-        possibleMovesWithScore.sort(key=lambda x:x[1], reverse=True)
-        for index,move in enumerate(possibleMovesWithScore):
-            possibleMoves[index] = move[0]
-            # self.board[move[0]] = int(move[1])
+        # sort the possible move list according to the score,
+        # moves with equal scores keep their order
+        order = np.argsort(-(attack + defend), kind = 'stable')
+        sortedMoves = [possibleMoves[index] for index in order]
+        for index, move in enumerate(sortedMoves):
+            possibleMoves[index] = move
         return possibleMoves
 
@@ -0,0 +1,20 @@
+"""
+benchmark
+
+Reproducible benchmarks for the hot paths of the gomoku4 engine.
+Run from the assignment4_changed directory:
+
+    python3 -m benchmark [--quick] [--output results.json]
+                         [--baseline benchmark/baseline.json] [--save-baseline]
+
+Workloads are built from a fixed seed, results are written as JSON and
+compared against a stored baseline.
+"""
+
+import os
+import sys
+
+GOMOKU4_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "gomoku4")
+if GOMOKU4_DIR not in sys.path:
+    sys.path.insert(0, GOMOKU4_DIR)
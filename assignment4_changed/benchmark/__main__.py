@@ -0,0 +1,83 @@
+"""
+Command line entry point: python3 -m benchmark
+"""
+
+import argparse
+import json
+import os
+import platform
+
+import numpy as np
+
+from benchmark.bench import run_benchmarks
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def to_json(metrics, seed, quick):
+    return {
+        "seed": seed,
+        "quick": quick,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "metrics": {name: {"value": value, "unit": unit, "higher_is_better": higher}
+                    for name, (value, unit, higher) in metrics.items()},
+    }
+
+def compare(results, baseline, tolerance):
+    """
+    Print every metric next to its baseline value.
+    Returns the names of the metrics that are worse than the baseline
+    by more than tolerance (a fraction).
+    """
+    regressions = []
+    for name, result in results["metrics"].items():
+        value = result["value"]
+        if name not in baseline["metrics"]:
+            print("{:28} {:14.4g} {:12} (no baseline)".format(name, value, result["unit"]))
+            continue
+        base = baseline["metrics"][name]["value"]
+        ratio = value / base if base else float('inf') if value else 1.0
+        if result["higher_is_better"]:
+            worse = ratio < 1 - tolerance
+        else:
+            worse = ratio > 1 + tolerance
+        print("{:28} {:14.4g} {:12} baseline {:12.4g} x{:6.2f}{}".format(
+              name, value, result["unit"], base, ratio, "  REGRESSION" if worse else ""))
+        if worse:
+            regressions.append(name)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the gomoku4 engine")
+    parser.add_argument("--seed", type=int, default=496)
+    parser.add_argument("--quick", action="store_true", help="smaller workloads")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per benchmark, the best run is reported")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before a regression is reported")
+    args = parser.parse_args()
+
+    results = to_json(run_benchmarks(args.seed, args.quick, args.repeat), args.seed, args.quick)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print("saved baseline", args.baseline)
+        return
+    baseline = {"metrics": {}}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("regressions:", ' '.join(regressions))
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
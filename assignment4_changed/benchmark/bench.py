@@ -0,0 +1,176 @@
+"""
+bench.py
+
+The individual benchmarks. Every benchmark returns a dictionary
+{metric name: (value, unit, higher is better)}.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import alphabeta
+import random_source
+from Gomoku4 import GomokuSimulationPlayer, undo
+from benchmark import GOMOKU4_DIR
+from benchmark.workloads import random_positions, gtp_positions
+
+def _rate(count, seconds):
+    return count / seconds if seconds > 0 else float('inf')
+
+def bench_play_undo(positions, rounds):
+    count = 0
+    start = time.perf_counter()
+    for board in positions:
+        moves = list(board.get_empty_points())
+        for _ in range(rounds):
+            for move in moves:
+                board.play_move_gomoku(move, board.current_player)
+                undo(board, move)
+                count += 1
+    seconds = time.perf_counter() - start
+    return {"play_undo": (_rate(count, seconds), "moves/s", True)}
+
+def bench_game_end(positions, rounds):
+    count = 0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for board in positions:
+            board.check_game_end_gomoku()
+            count += 1
+    seconds = time.perf_counter() - start
+    return {"check_game_end": (_rate(count, seconds), "calls/s", True)}
+
+def _latency(positions, function):
+    start = time.perf_counter()
+    for board in positions:
+        function(board)
+    return 1000 * (time.perf_counter() - start) / len(positions)
+
+def bench_patterns(positions):
+    return {
+        "get_pattern_moves": (_latency(positions, lambda b: b.get_pattern_moves()),
+                              "ms", False),
+        "list_solve_point": (_latency(positions, lambda b: b.list_solve_point()),
+                             "ms", False),
+        "ScanBoard": (_latency(positions, lambda b: b.ScanBoard(b.get_empty_points())),
+                      "ms", False),
+    }
+
+def bench_playouts(positions, seed, policy, cutoff=0):
+    random_source.seed(seed)
+    with tempfile.TemporaryDirectory() as store_dir:
+        player = GomokuSimulationPlayer(playout_policy=policy,
+                                        exp_path=os.path.join(store_dir, "exp.db"))
+        player.playout_cutoff = cutoff
+        start = time.perf_counter()
+        for board in positions:
+            player._do_playout(board, board.current_player)
+        seconds = time.perf_counter() - start
+    name = "playouts_" + policy + ("_truncated" if cutoff else "")
+    return {name: (_rate(len(positions), seconds), "playouts/s", True)}
+
+def _alarm_handler(signum, frame):
+    raise TimeoutError
+
+def bench_solve(max_empty, timelimit):
+    """
+    Solve the positions of the solve commands in the .gtp test files
+    with at most max_empty empty points.
+    """
+    positions = [board for _, _, board in gtp_positions(("solve",))
+                 if len(board.get_empty_points()) <= max_empty]
+    old_handler = signal.signal(signal.SIGALRM, _alarm_handler)
+    seconds = 0.0
+    timeouts = 0
+    try:
+        for board in positions:
+            start = time.perf_counter()
+            try:
+                signal.alarm(timelimit)
+                alphabeta.solve(board.copy())
+            except TimeoutError:
+                timeouts += 1
+            finally:
+                signal.alarm(0)
+            seconds += time.perf_counter() - start
+    finally:
+        signal.signal(signal.SIGALRM, old_handler)
+    return {"solve_corpus": (seconds, "s", False),
+            "solve_corpus_positions": (len(positions), "positions", True),
+            "solve_corpus_timeouts": (timeouts, "timeouts", False)}
+
+def _startup_time(script):
+    """
+    Seconds from launching script until it answered protocol_version,
+    name and boardsize, and until it answered the first genmove.
+    The engine uses an empty experience store in a temporary directory.
+    """
+    with tempfile.TemporaryDirectory() as store_dir:
+        env = dict(os.environ, GOMOKU_EXP_DB=os.path.join(store_dir, "exp.db"))
+        return _time_engine(script, env)
+
+def _time_engine(script, env):
+    start = time.perf_counter()
+    engine = subprocess.Popen([sys.executable, os.path.join(GOMOKU4_DIR, script)],
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL, text=True, cwd=GOMOKU4_DIR,
+                              env=env)
+    try:
+        engine.stdin.write("protocol_version\nname\nboardsize 7\n")
+        engine.stdin.flush()
+        for _ in range(6):
+            engine.stdout.readline()
+        handshake = time.perf_counter() - start
+        engine.stdin.write("genmove b\n")
+        engine.stdin.flush()
+        for _ in range(2):
+            engine.stdout.readline()
+        first_move = time.perf_counter() - start
+        engine.stdin.write("quit\n")
+        engine.stdin.flush()
+        engine.wait()
+    finally:
+        if engine.poll() is None:
+            engine.kill()
+    return handshake, first_move
+
+def bench_startup():
+    metrics = {}
+    for name, script in [("startup", "Gomoku4.py"), ("fast_start", "fast_start.py")]:
+        handshake, first_move = _startup_time(script)
+        metrics[name + "_handshake"] = (1000 * handshake, "ms", False)
+        metrics[name + "_first_genmove"] = (1000 * first_move, "ms", False)
+    return metrics
+
+def run_benchmarks(seed=496, quick=False, repeat=3):
+    """
+    Run all benchmarks repeat times on workloads generated from seed
+    and keep the best value of each metric.
+    quick uses smaller workloads.
+    """
+    best = {}
+    for _ in range(repeat):
+        for name, (value, unit, higher) in _run_once(seed, quick).items():
+            if name in best:
+                value = max(value, best[name][0]) if higher else min(value, best[name][0])
+            best[name] = (value, unit, higher)
+    return best
+
+def _run_once(seed, quick):
+    scale = 1 if quick else 5
+    positions = random_positions(seed, 20 * scale)
+    metrics = {}
+    metrics.update(bench_startup())
+    metrics.update(bench_play_undo(positions, 2 * scale))
+    metrics.update(bench_game_end(positions, 10 * scale))
+    metrics.update(bench_patterns(positions))
+    playout_positions = random_positions(seed + 1, 10 * scale)
+    metrics.update(bench_playouts(playout_positions, seed, 'random'))
+    metrics.update(bench_playouts(playout_positions, seed, 'rule_based'))
+    metrics.update(bench_playouts(playout_positions, seed, 'rule_based', cutoff=4))
+    metrics.update(bench_solve(max_empty=12 if quick else 16, timelimit=10))
+    return metrics
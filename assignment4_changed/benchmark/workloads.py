@@ -0,0 +1,78 @@
+"""
+workloads.py
+
+Seeded board positions and the solve corpus taken from the .gtp test files.
+"""
+
+import os
+import random
+
+from board_util import BLACK, WHITE, coord_to_point
+from simple_board import SimpleGoBoard
+from gtp_connection import move_to_coord
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+GTP_FILES = [
+    "assignment2/assignment2-public-tests.gtp",
+    "assignment2/test1.gtp",
+    "assignment2/test2.gtp",
+    "assignment2/test3.gtp",
+    "assignment2/test4.gtp",
+    "assignment2/test5.gtp",
+    "assignment3/assignment3-public-tests.gtp",
+]
+
+def random_position(rng, size=7, num_stones=10):
+    """
+    Play num_stones random alternating stones on an empty board,
+    avoiding moves that end the game.
+    """
+    board = SimpleGoBoard(size)
+    while num_stones > 0:
+        moves = list(board.get_empty_points())
+        rng.shuffle(moves)
+        for move in moves:
+            color = board.current_player
+            board.play_move_gomoku(move, color)
+            if not board.point_check_game_end_gomoku(move):
+                break
+            board.undo_move_gomoku(move)
+        num_stones -= 1
+    return board
+
+def random_positions(seed, count, size=7, min_stones=4, max_stones=20):
+    rng = random.Random(seed)
+    return [random_position(rng, size, rng.randint(min_stones, max_stones))
+            for _ in range(count)]
+
+def gtp_positions(commands=("solve",), files=GTP_FILES):
+    """
+    Replay the setup commands of the .gtp test files and return
+    (file name, command number, board) for every command in commands.
+    """
+    positions = []
+    for name in files:
+        board = SimpleGoBoard(7)
+        with open(os.path.join(REPO_DIR, name)) as f:
+            for line in f:
+                elements = line.split()
+                if not elements or elements[0].startswith('#'):
+                    continue
+                number = ''
+                if elements[0].isdigit():
+                    number = elements.pop(0)
+                    if not elements:
+                        continue
+                cmd, args = elements[0], elements[1:]
+                if cmd == "boardsize":
+                    board = SimpleGoBoard(int(args[0]))
+                elif cmd == "clear_board":
+                    board = SimpleGoBoard(board.size)
+                elif cmd == "play":
+                    color = BLACK if args[0].lower() == 'b' else WHITE
+                    row, col = move_to_coord(args[1], board.size)
+                    board.play_move_gomoku(coord_to_point(row, col, board.size), color)
+                elif cmd in commands:
+                    positions.append((name, number, board.copy()))
+    return positions
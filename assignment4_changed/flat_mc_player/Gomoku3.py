@@ -6,8 +6,11 @@ from gtp_connection import GtpConnection
 from board_util import GoBoardUtil, EMPTY
 from simple_board import SimpleGoBoard
 
-import random
+import random_source
+import time
 import numpy as np
+import root_allocation
+from amaf import AmafStats
 
 def undo(board,move):
     board.board[move]=EMPTY
@@ -45,6 +48,14 @@ class GomokuSimulationPlayer(object):
         self.name="Gomoku3"
         self.version = 3.0
         self.best_move=None
+        # seconds per move, set by the GTP connection before get_move
+        self.timelimit=2
+        # how the playouts are spread over the moves, see root_allocation,
+        # and the part of the time limit they may use
+        self.root_policy='sequential_halving'
+        self.search_time_share=0.9
+        # RAVE: weight of the AMAF statistics of the moves, 0 turns it off
+        self.rave_equivalence=0
     
     def set_playout_policy(self, playout_policy='random'):
         assert(playout_policy in ['random', 'rule_based'])
@@ -65,17 +76,28 @@ class GomokuSimulationPlayer(object):
             movetype_id, moves=ret
             return self.pattern_list[movetype_id], moves
     
-    def _do_playout(self, board, color_to_play):
+    def _do_playout(self, board, color_to_play, played=None):
+        """
+        Play one playout and take it back. Returns the result for
+        color_to_play, the moves are appended to the list played if given.
+        """
         res=game_result(board)
         simulation_moves=[]
-        while(res is None):
-            _ , candidate_moves = self.policy_moves(board, board.current_player)
-            playout_move=random.choice(candidate_moves)
-            play_move(board, playout_move, board.current_player)
-            simulation_moves.append(playout_move)
-            res=game_result(board)
-        for m in simulation_moves[::-1]:
-            undo(board, m)
+        if res is None and self.playout_policy=='random':
+            # plays and takes back the whole playout
+            winner=GoBoardUtil.random_playout_gomoku(board, simulation_moves)
+            res='draw' if winner is None else winner
+        else:
+            while(res is None):
+                _ , candidate_moves = self.policy_moves(board, board.current_player)
+                playout_move=random_source.choice(candidate_moves)
+                play_move(board, playout_move, board.current_player)
+                simulation_moves.append(playout_move)
+                res=game_result(board)
+            for m in simulation_moves[::-1]:
+                undo(board, m)
+        if played is not None:
+            played.extend(simulation_moves)
         if res == color_to_play:
             return 1.0
         elif res == 'draw':
@@ -88,32 +110,45 @@ class GomokuSimulationPlayer(object):
         """
         The genmove function called by gtp_connection
         """
+        start=time.time()
         moves=GoBoardUtil.generate_legal_moves_gomoku(board)
         toplay=board.current_player
-        best_result, best_move=-1.1, None
-        best_move=moves[0]
+        self.best_move=moves[0]
+        for move in moves:
+            play_move(board, move, toplay)
+            res=game_result(board)
+            undo(board, move)
+            if res == toplay:
+                #This move is a immediate win
+                self.best_move=move
+                return move
         wins = np.zeros(len(moves))
         visits = np.zeros(len(moves))
-        while True:
-            for i, move in enumerate(moves):
-                play_move(board, move, toplay)
-                res=game_result(board)
-                if res == toplay:
-                    undo(board, move)
-                    #This move is a immediate win
-                    self.best_move=move
-                    return move
-                ret=self._do_playout(board, toplay)
-                wins[i] += ret
-                visits[i] += 1
-                win_rate = wins[i] / visits[i]
-                if win_rate > best_result:
-                    best_result=win_rate
-                    best_move=move
-                    self.best_move=best_move
-                undo(board, move)
-        assert(best_move is not None)
-        return best_move
+
+        amaf = None
+        value = None
+        if self.rave_equivalence > 0:
+            amaf = AmafStats(len(board.board), self.rave_equivalence)
+            points = np.array(moves, dtype=np.int64)
+            value = lambda wins, visits: amaf.blend(points, wins, visits)
+
+        def simulate(i):
+            played = []
+            play_move(board, moves[i], toplay)
+            ret=self._do_playout(board, toplay, played)
+            undo(board, moves[i])
+            if amaf is not None:
+                # the opponent starts the playout
+                amaf.update([moves[i]] + played[1::2], ret)
+            return ret
+
+        def report(i):
+            self.best_move=moves[i]
+
+        deadline = start + self.timelimit * self.search_time_share
+        best = root_allocation.allocate(self.root_policy, simulate,
+                                        wins, visits, deadline, report, value)
+        return moves[best]
 
 def run():
     """
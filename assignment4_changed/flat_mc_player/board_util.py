@@ -4,7 +4,7 @@ Utility functions for Go board.
 """
 
 import numpy as np
-from random import shuffle
+import random_source
 
 """
 Encoding of colors on and off a Go board.
@@ -122,7 +122,7 @@ class GoBoardUtil(object):
         legal_moves = []
         for move in moves:
             legal_moves.append(move)
-        shuffle(legal_moves)
+        random_source.shuffle(legal_moves)
         return legal_moves
             
     @staticmethod
@@ -133,9 +133,36 @@ class GoBoardUtil(object):
         moves = board.get_empty_points()
         if len(moves) == 0:
             return PASS
-        np.random.shuffle(moves)
+        random_source.shuffle(moves)
         return moves[0]
 
+    @staticmethod
+    def random_playout_gomoku(board, played=None):
+        """
+        Play random moves for both colors until the game ends, then take
+        them back. The game must not be over yet.
+        The empty points are shuffled once and played in that order, and
+        only the last move is checked for five in a row. The moves are
+        appended to the list played if given.
+        Returns the winner, or None for a draw.
+        """
+        moves = board.get_empty_points()
+        random_source.shuffle(moves)
+        color = board.current_player
+        winner = None
+        count = 0
+        for move in moves:
+            board.board[move] = color
+            count += 1
+            if board.point_check_game_end_gomoku(move):
+                winner = color
+                break
+            color = GoBoardUtil.opponent(color)
+        board.board[moves[:count]] = EMPTY
+        if played is not None:
+            played.extend(moves[:count].tolist())
+        return winner
+
     @staticmethod       
     def generate_random_move(board, color, use_eye_filter):
         """
@@ -150,7 +177,7 @@ class GoBoardUtil(object):
             the color to generate the move for.
         """
         moves = board.get_empty_points()
-        np.random.shuffle(moves)
+        random_source.shuffle(moves)
         for move in moves:
             legal = not (use_eye_filter and board.is_eye(move, color)) \
                     and board.is_legal(move, color)
@@ -7,12 +7,15 @@ in the Deep-Go project by Isaac Henrion and Amos Storkey
 at the University of Edinburgh.
 """
 import traceback
+from profiler import CommandProfiler
 from sys import stdin, stdout, stderr
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, PASS, \
                        MAXSIZE, coord_to_point
 import numpy as np
 import re
 import signal
+import root_allocation
+import random_source
 
 class GtpConnection():
 
@@ -56,8 +59,15 @@ class GtpConnection():
             "solve": self.solve_cmd,
             "list_solve_point": self.list_solve_point_cmd, # below is added for Gomoku3
             "policy": self.set_playout_policy, 
-            "policy_moves": self.display_pattern_moves
+            "policy_moves": self.display_pattern_moves,
+            "root_policy": self.root_policy_cmd,
+            "rave": self.rave_cmd,
+            "seed": self.seed_cmd,
+            "profile": self.profile_cmd,
+            "profile_summary": self.profile_summary_cmd
         }
+        self.profiler = CommandProfiler.from_environment()
+        self.profiled_commands = {"genmove", "solve"}
         self.timelimit=2
 
         # used for argument checking
@@ -70,7 +80,10 @@ class GtpConnection():
             "genmove": (1, 'Usage: genmove {w,b}'),
             "play": (2, 'Usage: play {b,w} MOVE'),
             "legal_moves": (1, 'Usage: legal_moves {w,b}'),
-            "policy":(1, 'Usage: set playout policy {random, rule_based}')
+            "policy":(1, 'Usage: set playout policy {random, rule_based}'),
+            "root_policy": (1, 'Usage: root_policy {round_robin,sequential_halving,ucb1}'),
+            "seed": (1, 'Usage: seed INT'),
+            "rave": (1, 'Usage: rave EQUIVALENCE (0 is off)')
         }
     
     def set_playout_policy(self, args):
@@ -78,6 +91,41 @@ class GtpConnection():
         self.go_engine.set_playout_policy(playout_policy)
         self.respond()
 
+    def root_policy_cmd(self, args):
+        """ How genmove spreads its playouts over the moves, see root_allocation """
+        if args[0] not in root_allocation.ALLOCATORS:
+            self.error('Usage: root_policy {round_robin,sequential_halving,ucb1}')
+            return
+        self.go_engine.root_policy = args[0]
+        self.respond()
+
+    def rave_cmd(self, args):
+        """
+        rave N: blend the AMAF statistics into the move values,
+        with equal weight at N playouts of a move. rave 0 turns it off.
+        """
+        try:
+            equivalence = int(args[0])
+        except ValueError:
+            equivalence = -1
+        if equivalence < 0:
+            self.error('Usage: rave EQUIVALENCE (0 is off)')
+            return
+        self.go_engine.rave_equivalence = equivalence
+        self.respond()
+
+    def seed_cmd(self, args):
+        """
+        seed N: restart the random numbers of the playouts and move
+        generators with seed N, see random_source
+        """
+        try:
+            random_source.seed(int(args[0]))
+        except ValueError:
+            self.error('Usage: seed INT')
+            return
+        self.respond()
+
     def display_pattern_moves(self, args):
         game_end, winner = self.board.check_game_end_gomoku()
         color=self.board.current_player
@@ -135,7 +183,10 @@ class GtpConnection():
             return
         if command_name in self.commands:
             try:
-                self.commands[command_name](args)
+                if self.profiler.enabled and command_name in self.profiled_commands:
+                    self.profiler.run(command_name, self.commands[command_name], args)
+                else:
+                    self.commands[command_name](args)
             except Exception as e:
                 self.debug_msg("Error executing command {}\n".format(str(e)))
                 self.debug_msg("Stack Trace:\n{}\n".
@@ -146,6 +197,38 @@ class GtpConnection():
             self.error('Unknown command')
             stdout.flush()
 
+    def profile_cmd(self, args):
+        """
+        profile on [DIR]: profile genmove and solve, writing to DIR
+        profile off: stop profiling
+        """
+        if not args or args[0].lower() not in ("on", "off") or len(args) > 2:
+            self.error('Usage: profile {on [DIR],off}')
+            return
+        if args[0].lower() == "on":
+            self.profiler.enable(args[1] if len(args) == 2 else None)
+            self.respond(self.profiler.directory)
+        else:
+            self.profiler.disable()
+            self.respond()
+
+    def profile_summary_cmd(self, args):
+        """
+        profile_summary [N] [TOP]: the TOP functions with the most own time
+        over the last N profiled commands
+        """
+        try:
+            last = int(args[0]) if len(args) > 0 else 10
+            top = int(args[1]) if len(args) > 1 else 15
+        except ValueError:
+            self.error('Usage: profile_summary [N] [TOP]')
+            return
+        lines = self.profiler.summary(last, top)
+        if not lines:
+            self.respond("no profiles")
+            return
+        self.respond('\n' + '\n'.join(lines))
+
     def has_arg_error(self, cmd, argnum):
         """
         Verify the number of arguments of cmd.
@@ -324,6 +407,7 @@ class GtpConnection():
             self.respond("pass")
             return
         move=None
+        self.go_engine.timelimit = int(self.timelimit)
         try:
             signal.alarm(int(self.timelimit))
             self.sboard = self.board.copy()
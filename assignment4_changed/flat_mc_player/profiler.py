@@ -0,0 +1,83 @@
+"""
+profiler.py
+
+Per-command cProfile profiles for the GTP engines.
+
+When enabled, the slow commands (genmove, solve) run under cProfile.
+Every profile is written to the profile directory as
+<number>-<command>.prof, which can be read with pstats or snakeviz,
+and the last profiles are kept in memory for a summary of the hot functions.
+
+Profiling is enabled with the GOMOKU_PROFILE environment variable
+set to the profile directory, or with the GTP command `profile on [DIR]`.
+cProfile and pstats are only imported once profiling is used.
+"""
+
+import os
+from collections import deque
+
+DEFAULT_DIRECTORY = "profiles"
+
+class CommandProfiler(object):
+
+    def __init__(self, directory=None, keep=50):
+        """
+        directory: where the .prof files are written, profiling is
+            disabled if it is None
+        keep: number of profiles kept in memory for summary
+        """
+        self.directory = directory
+        self.history = deque(maxlen=keep)
+        self.count = 0
+
+    @staticmethod
+    def from_environment():
+        return CommandProfiler(os.environ.get("GOMOKU_PROFILE") or None)
+
+    @property
+    def enabled(self):
+        return self.directory is not None
+
+    def enable(self, directory=None):
+        self.directory = directory or self.directory or DEFAULT_DIRECTORY
+
+    def disable(self):
+        self.directory = None
+
+    def run(self, name, function, *args):
+        """
+        Call function(*args) under cProfile and save the profile.
+        """
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.runcall(function, *args)
+        finally:
+            self.count += 1
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, "{:04d}-{}.prof".format(self.count, name))
+            profile.dump_stats(path)
+            self.history.append((name, profile))
+
+    def summary(self, last=10, top=15):
+        """
+        Return lines with the functions with the most own time
+        over the last profiled commands.
+        """
+        profiles = list(self.history)[-last:]
+        if not profiles:
+            return []
+        import pstats
+        stats = pstats.Stats(profiles[0][1])
+        for _, other in profiles[1:]:
+            stats.add(other)
+        total = sum(tt for _, _, tt, _, _ in stats.stats.values())
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        lines = ["{} commands: {}".format(len(profiles),
+                                          ' '.join(name for name, _ in profiles)),
+                 "  tottime  percent  cumtime   ncalls  function"]
+        for (filename, line, function), (_, ncalls, tt, ct, _) in rows[:top]:
+            lines.append("{:9.3f} {:7.1f}% {:8.3f} {:8d}  {}:{}({})".format(
+                tt, 100 * tt / total if total else 0, ct, ncalls,
+                os.path.basename(filename), line, function))
+        return lines
@@ -0,0 +1,63 @@
+"""
+random_source.py
+
+The random numbers of the playouts and the move generators.
+
+Calling random.choice for every move costs far more than the random
+number itself. RandomSource draws a block of uniforms in [0, 1) at once
+from a numpy Generator and hands them out one by one. Whole arrays are
+shuffled by the Generator itself, which draws its numbers in C.
+
+All players and move generators use the shared source of this module
+through choice and shuffle. seed(n) restarts it, so that games and
+benchmark runs can be repeated exactly; seed() takes fresh entropy.
+"""
+
+import numpy as np
+
+class RandomSource(object):
+
+    def __init__(self, seed=None, block_size=4096):
+        self.block_size = block_size
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        self.generator = np.random.default_rng(seed)
+        self._refill()
+
+    def _refill(self):
+        self._values = self.generator.random(self.block_size).tolist()
+        self._next = 0
+
+    def uniform(self):
+        """ One uniform number in [0, 1) """
+        if self._next == self.block_size:
+            self._refill()
+        value = self._values[self._next]
+        self._next += 1
+        return value
+
+    def choice(self, seq):
+        """ A random element of the non-empty sequence seq """
+        return seq[int(self.uniform() * len(seq))]
+
+    def shuffle(self, x):
+        """ Shuffle the list or numpy array x in place """
+        if isinstance(x, np.ndarray):
+            self.generator.shuffle(x)
+        else:
+            x[:] = [x[i] for i in self.generator.permutation(len(x)).tolist()]
+
+_source = RandomSource()
+
+def seed(n=None):
+    _source.seed(n)
+
+def uniform():
+    return _source.uniform()
+
+def choice(seq):
+    return _source.choice(seq)
+
+def shuffle(x):
+    _source.shuffle(x)
@@ -378,8 +378,8 @@ class SimpleGoBoard(object):
                     break
             else:
                 break
-        assert count <= 5
-        return count == 5
+        # a move that joins two lines can make more than five in a row
+        return count >= 5
     
     def point_check_game_end_gomoku(self, point):
         """
@@ -3,21 +3,33 @@
 # Set the path to your python3 above
 
 from gtp_connection import GtpConnection
-from board_util import GoBoardUtil, EMPTY
+from board_util import GoBoardUtil
 from simple_board import SimpleGoBoard
 
-import random
+import random_source
+import os
+import sys
+import time
 import numpy as np
-import pickle
+import alphabeta
+import root_allocation
+from amaf import AmafStats
+import evaluation
+import search_stats
+from exp_store import ExperienceStore, position_key
+from policy_cache import PolicyCache
+from move_picker import MovePicker
+from transposition import TranspositionTable
 
 def undo(board,move):
-    board.board[move]=EMPTY
-    board.current_player=GoBoardUtil.opponent(board.current_player)
+    board.undo_move_gomoku(move)
 
 def play_move(board, move, color):
     board.play_move_gomoku(move, color)
 
 def game_result(board):
+    if board.is_dead_draw():
+        return 'draw'
     game_end, winner = board.check_game_end_gomoku()
     moves = board.get_empty_points()
     board_full = (len(moves) == 0)
@@ -34,7 +46,13 @@ class GomokuSimulationPlayer(object):
     then select the one with best win-rate.
     playout could be either random or rule_based (i.e., uses pre-defined patterns) 
     """
-    def __init__(self, n_simualtions_per_move=10, playout_policy='rule_based', board_size=7):
+    def __init__(self, n_simualtions_per_move=10, playout_policy='rule_based', board_size=7,
+                 exp_path=None):
+        """
+        exp_path: the SQLite file of the experience store, by default
+        from the GOMOKU_EXP_DB environment variable, else exp.db next
+        to this file
+        """
         assert(playout_policy in ['random', 'rule_based'])
         self.n_simualtions_per_move=n_simualtions_per_move
         self.board_size=board_size
@@ -46,17 +64,46 @@ class GomokuSimulationPlayer(object):
         self.name="Gomoku4"
         self.version = 3.0
         self.best_move=None
-        self.path = "/".join(__file__.split("/")[:-1] + ["exp.dat"])
-        try:
-            with open(self.path, 'rb') as f:
-                self.exp = pickle.load(f)
-        except Exception:
-            self.exp = {}
-
-    def save_exp(self):
-        with open(self.path, 'wb') as f:
-            pickle.dump(self.exp,f)
-        
+        # seconds per move, set by the GTP connection before get_move
+        self.timelimit=59
+        # the exact solver is tried when its estimated time
+        # solver_branching ** empty points / solver_nodes_per_second
+        # fits into solver_share of the time limit. Positions with forcing
+        # moves count forcing_discount empty points less.
+        self.solver_share=0.5
+        self.solver_branching=2.0
+        self.solver_nodes_per_second=2000
+        self.forcing_discount=4
+        # what the solver learned, kept between solves. The table is
+        # saved to solver_table_path after every solve command if it is
+        # set, by default from the GOMOKU_SOLVER_TABLE environment variable
+        self.solver_table=TranspositionTable()
+        self.solver_picker=MovePicker()
+        self.solver_table_path=None
+        self.use_solver_table(os.environ.get("GOMOKU_SOLVER_TABLE") or None)
+        # how the playouts are spread over the moves, see root_allocation,
+        # and the part of the time limit they may use
+        self.root_policy='sequential_halving'
+        self.search_time_share=0.9
+        # RAVE: weight of the AMAF statistics of the moves, 0 turns it off
+        self.rave_equivalence=0
+        # truncated playouts: after playout_cutoff moves (0 plays to the
+        # end) a playout stops at the first quiet position, one without
+        # Win, BlockWin, OpenFour or BlockOpenFour moves, and is scored by
+        # the evaluator, see evaluation
+        self.playout_cutoff=0
+        self.evaluator='threats'
+        self.evaluation_scale=1.0
+        # pondering: number of opponent replies searched, and the
+        # statistics of the positions after them, see ponder
+        self.ponder_width=3
+        self.ponder_results={}
+        # rule-based policy results of recent positions, see policy_cache
+        self.policy_cache=PolicyCache()
+        self.path = exp_path or os.environ.get("GOMOKU_EXP_DB") or \
+                    os.path.join(os.path.dirname(os.path.abspath(__file__)), "exp.db")
+        self.exp = ExperienceStore(self.path)
+
     def set_playout_policy(self, playout_policy='random'):
         assert(playout_policy in ['random', 'rule_based'])
         self.playout_policy=playout_policy
@@ -70,23 +117,47 @@ class GomokuSimulationPlayer(object):
         else:
             assert(self.playout_policy=='rule_based')
             assert(isinstance(board, SimpleGoBoard))
-            ret=board.get_pattern_moves()
+            ret=self.policy_cache.pattern_moves(board)
             if ret is None:
                 return "Random", self._random_moves(board, color_to_play)
             movetype_id, moves=ret
             return self.pattern_list[movetype_id], moves
     
-    def _do_playout(self, board, color_to_play):
+    def _do_playout(self, board, color_to_play, played=None):
+        """
+        Play one playout and take it back. Returns the result for
+        color_to_play, the moves are appended to the list played if given.
+        A truncated playout returns the evaluation, a value in [-1, 1].
+        """
         res=game_result(board)
         simulation_moves=[]
-        while(res is None):
-            _ , candidate_moves = self.policy_moves(board, board.current_player)
-            playout_move=random.choice(candidate_moves)
-            play_move(board, playout_move, board.current_player)
-            simulation_moves.append(playout_move)
-            res=game_result(board)
-        for m in simulation_moves[::-1]:
-            undo(board, m)
+        value=None
+        if res is None and self.playout_policy=='random' and not self.playout_cutoff:
+            # plays and takes back the whole playout
+            winner=GoBoardUtil.random_playout_gomoku(board, simulation_moves)
+            res='draw' if winner is None else winner
+        else:
+            while(res is None):
+                movetype, candidate_moves = self.policy_moves(board, board.current_player)
+                if self.playout_cutoff and len(simulation_moves) >= self.playout_cutoff \
+                        and self._is_quiet(board, movetype):
+                    value = self.evaluate(board)
+                    if board.current_player != color_to_play:
+                        value = -value
+                    break
+                playout_move=random_source.choice(candidate_moves)
+                play_move(board, playout_move, board.current_player)
+                simulation_moves.append(playout_move)
+                res=game_result(board)
+            for m in simulation_moves[::-1]:
+                undo(board, m)
+        if played is not None:
+            played.extend(simulation_moves)
+        stats = search_stats.current
+        if stats is not None:
+            stats.playout(len(simulation_moves))
+        if value is not None:
+            return value
         if res == color_to_play:
             return 1.0
         elif res == 'draw':
@@ -95,10 +166,110 @@ class GomokuSimulationPlayer(object):
             assert(res == GoBoardUtil.opponent(color_to_play))
             return -1.0
 
+    def _is_quiet(self, board, movetype):
+        """ No threat moves for the player to move, movetype is from policy_moves """
+        if self.playout_policy == 'rule_based':
+            return movetype == "Random"
+        return board.get_pattern_moves() is None
+
+    def evaluate(self, board):
+        """ Static evaluation for the player to move, in [-1, 1] """
+        return evaluation.EVALUATORS[self.evaluator](board, self.evaluation_scale)
+
+    def use_solver_table(self, path):
+        """
+        Save the solver table to path after every solve command,
+        after adding the entries already saved there. None stops saving.
+        """
+        if path is not None and os.path.exists(path):
+            self.solver_table.load(path)
+        self.solver_table_path = path
+
+    def clear_solver_table(self):
+        self.solver_table.clear()
+        self.solver_picker = MovePicker()
+
+    def save_solver_table(self):
+        if self.solver_table_path is not None:
+            self.solver_table.save(self.solver_table_path)
+
+    def solver_budget(self, board):
+        """
+        Seconds for the exact solver in this position,
+        0 if it is not expected to finish in its share of the time limit.
+        """
+        empties = len(board.get_empty_points())
+        if board.list_solve_point():
+            empties -= self.forcing_discount
+        budget = self.timelimit * self.solver_share
+        estimate = self.solver_branching ** max(empties, 0) / self.solver_nodes_per_second
+        return budget if estimate <= budget else 0
+
+    def solve_move(self, board, budget):
+        """
+        Run the exact solver for at most budget seconds.
+        Returns a winning move, else a drawing move, or None if the
+        position is lost or the solver did not finish.
+        """
+        try:
+            result, move, drawMove = alphabeta.solve(board.copy(), time.time() + budget,
+                                                     self.solver_table, picker=self.solver_picker)
+        except alphabeta.SolverTimeout:
+            return None
+        if move == "First":
+            return None
+        if move != "NoMove":
+            return move
+        return drawMove if result else None
+
+    def likely_replies(self, board):
+        """ The moves the player to move on board is most likely to play """
+        pattern, moves = self.policy_moves(board, board.current_player)
+        if pattern == "Random":
+            moves = board.ScanBoard(board.get_empty_points())
+        return [int(move) for move in moves[:self.ponder_width]]
+
+    def ponder(self, board, stop):
+        """
+        Run playouts on the opponent's time until the event stop is set.
+        board is the position after our move, with the opponent to move.
+        For each likely reply the playouts of get_move are run in the
+        position after it, round robin, and the statistics are left in
+        ponder_results, where get_move picks up those of the actual reply.
+        """
+        searches = []
+        for reply in self.likely_replies(board):
+            after = board.copy()
+            play_move(after, reply, after.current_player)
+            if game_result(after) is not None or \
+               len(after.get_current_player_points()) <= 6:
+                continue
+            _, moves = self.policy_moves(after, after.current_player)
+            key = position_key(after)
+            wins, visits = self.exp.lookup(key)
+            searches.append((after, key, moves, wins, visits))
+        try:
+            while searches and not stop.is_set():
+                for after, _, moves, wins, visits in searches:
+                    toplay = after.current_player
+                    for move in moves:
+                        if stop.is_set():
+                            return
+                        play_move(after, move, toplay)
+                        if game_result(after) != toplay:
+                            ret = self._do_playout(after, toplay)
+                            wins[move] = wins.get(move,0)+ret
+                            visits[move] = visits.get(move,0)+1
+                        undo(after, move)
+        finally:
+            self.ponder_results = {key: (wins, visits)
+                                   for _, key, _, wins, visits in searches}
+
     def get_move(self, board, color_to_play):
         """
         The genmove function called by gtp_connection
         """
+        start = time.time()
         if len(board.get_current_player_points()) <= 6:
             # first 6 steps use score-based strategy
             all_possible_moves = board.get_empty_points()
@@ -107,43 +278,92 @@ class GomokuSimulationPlayer(object):
             
             return moves[0]
         else:
-            # use ruled-based simulation
             pattern,moves=self.policy_moves(board, board.current_player)
-            if pattern == self.pattern_list[0] or pattern == self.pattern_list[1]:
-                self.save_exp()
-            toplay=board.current_player
-            h = hash(board.board.tostring()) # hashing the current board state
-            if h not in self.exp:
-                self.exp[h] = ([-1.1,None],{},{})
-            best,wins,visits = self.exp[h]
             self.best_move = moves[0]
-            while True:
-                for move in moves:
-                    play_move(board, move, toplay)
-                    res=game_result(board)
-                    if res == toplay:
-                        undo(board, move)
-                        #This move is a immediate win
-                        self.best_move=move
-                        return move
-                    ret=self._do_playout(board, toplay)
-                    wins[move] = wins.get(move,0)+ret
-                    visits[move] = visits.get(move,0)+1
-                    win_rate = wins[move] / visits[move]
-                    if win_rate > best[0]:
-                        best[0]=win_rate
-                        best[1]=move
-                        self.best_move=move
-                    undo(board, move)
-            assert(best[1] is not None)
-            return best[1]
+            # solve the late game exactly if there is time for it
+            budget = self.solver_budget(board)
+            if budget > 0:
+                move = self.solve_move(board, budget)
+                if move is not None:
+                    self.best_move = move
+                    return move
+            # use ruled-based simulation
+            toplay=board.current_player
+            for move in moves:
+                play_move(board, move, toplay)
+                res=game_result(board)
+                undo(board, move)
+                if res == toplay:
+                    #This move is a immediate win
+                    self.best_move=move
+                    return move
+            h = position_key(board)
+            if h in self.ponder_results:
+                wins,visits = self.ponder_results[h]
+            else:
+                wins,visits = self.exp.lookup(h)
+            self.ponder_results = {}
+            return self.allocate_playouts(board, moves, h, wins, visits, start)
+
+    def allocate_playouts(self, board, moves, key, wins, visits, start):
+        """
+        Spread the playouts over moves with the root_policy strategy until
+        search_time_share of the time limit has passed since start.
+        wins and visits are the statistics {move: value} of the position,
+        they are updated and recorded in the experience store under key.
+        """
+        toplay=board.current_player
+        win_array = np.array([wins.get(move,0.0) for move in moves], dtype=float)
+        visit_array = np.array([visits.get(move,0) for move in moves], dtype=float)
+
+        amaf = None
+        value = None
+        if self.rave_equivalence > 0:
+            amaf = AmafStats(len(board.board), self.rave_equivalence)
+            points = np.array(moves, dtype=np.int64)
+            value = lambda wins, visits: amaf.blend(points, wins, visits)
+
+        def simulate(i):
+            played = []
+            play_move(board, moves[i], toplay)
+            ret=self._do_playout(board, toplay, played)
+            undo(board, moves[i])
+            if amaf is not None:
+                # the opponent starts the playout
+                amaf.update([moves[i]] + played[1::2], ret)
+            return ret
+
+        def report(i):
+            self.best_move=moves[i]
+
+        deadline = start + self.timelimit * self.search_time_share
+        try:
+            best = root_allocation.allocate(self.root_policy, simulate,
+                                            win_array, visit_array, deadline, report, value)
+        finally:
+            # runs when the time limit interrupts the search
+            for i, move in enumerate(moves):
+                if visit_array[i] > 0:
+                    wins[move] = float(win_array[i])
+                    visits[move] = int(visit_array[i])
+            self.exp.record(key, wins, visits)
+        return moves[best]
+
+def make_connection(pipelined=False, ponder=False):
+    board = SimpleGoBoard(7)
+    con = GtpConnection(GomokuSimulationPlayer(), board, pipelined=pipelined)
+    con.pondering = ponder
+    return con
 
 def run():
     """
     start the gtp connection and wait for commands.
+    Use --pipelined to read commands in large chunks and buffer responses,
+    --ponder to search on the opponent's time.
+    For the fastest startup use fast_start.py instead.
     """
-    board = SimpleGoBoard(7)
-    con = GtpConnection(GomokuSimulationPlayer(), board)
+    pipelined = "--pipelined" in sys.argv[1:]
+    con = make_connection(pipelined, "--ponder" in sys.argv[1:])
     con.start_connection()
 
 if __name__=='__main__':
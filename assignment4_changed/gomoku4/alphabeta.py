@@ -1,11 +1,28 @@
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER
+import search_stats
+import time
+import multiprocessing
+import queue
+import random_source
+from exp_store import position_key
+from move_picker import MovePicker
+from transposition import TranspositionTable, SharedTranspositionTable, EXACT, LOWER, UPPER
 #from profilehooks import profile
 
 def undo(board,move):
-    board.board[move]=EMPTY
-    board.current_player=GoBoardUtil.opponent(board.current_player)
+    board.undo_move_gomoku(move)
+
+class SolverTimeout(Exception):
+    """ The deadline given to solve has passed """
+    pass
 
 def game_end(board):
+    # no five can be made any more, so there is none on the board either
+    if board.is_dead_draw():
+        return 0
+    return game_over(board)
+
+def game_over(board):
     game_end, winner = board.check_game_end_gomoku()
     moves = board.get_empty_points()
     board_full = (len(moves) == 0)
@@ -15,65 +32,160 @@ def game_end(board):
         return 0
     return None
 
-def alphabeta(board,alpha,beta):
+def alphabeta(board,alpha,beta,depth=1,picker=None,deadline=None,table=None):
     #print(GoBoardUtil.get_twoD_board(board),alpha,beta)
+    if deadline is not None and time.time()>deadline:
+        raise SolverTimeout
+    stats=search_stats.current
+    if stats is not None:
+        stats.node(depth)
+    if table is not None:
+        key=position_key(board)
+        entry=table.get(key)
+        if entry is not None:
+            value,flag=entry
+            if flag==EXACT or (flag==LOWER and value>=beta) or (flag==UPPER and value<=alpha):
+                return max(alpha,min(beta,value))
     result=game_end(board)
     if (result!=None):
+        if table is not None:
+            table.put(key,result,EXACT)
         return result
-    solvePoint=board.list_solve_point()
-    if solvePoint:
-        #print(solvePoint[0])
-        board.play_move_gomoku(solvePoint[0],board.current_player)
-        result=-alphabeta(board,-beta,-alpha)
-        if(result>alpha):
-            alpha=result
-        undo(board,solvePoint[0])
+    if stats is not None:
+        stats.expand()
+    if picker is None:
+        picker=MovePicker()
+    alphaOrig=alpha
+    for i,m in enumerate(picker.moves(board,depth)):
+        board.play_move_gomoku(m,board.current_player)
+        result=-alphabeta(board,-beta,-alpha,depth+1,picker,deadline,table)
+        undo(board,m)
         if(result>=beta):
+            if stats is not None:
+                stats.cutoff(i)
+            picker.cutoff(board,m,depth)
+            if table is not None:
+                table.put(key,beta,LOWER)
             return beta
-    else:
-        for m in GoBoardUtil.generate_legal_moves_gomoku(board):
-            board.play_move_gomoku(m,board.current_player)
-            result=-alphabeta(board,-beta,-alpha)
-            if(result>alpha):
-                alpha=result
-            undo(board,m)
-            if(result>=beta):
-                return beta
+        if(result>alpha):
+            alpha=result
+            picker.store(board,m)
+    if table is not None:
+        table.put(key,alpha,EXACT if alpha>alphaOrig else UPPER)
     return alpha
 
+def root_result(board,picker):
+    """
+    The result of solve when no search is needed: the game is over, or
+    no five can be made any more, so every move draws and the first
+    move of picker is returned. None otherwise.
+    """
+    result=game_over(board)
+    if (result!=None):
+        return result,"First",None
+    if board.is_dead_draw():
+        return True,"NoMove",next(picker.moves(board,0))
+    return None
+
 #@profile
 """
-if have winning move, return _,winning_move
-else return have_draw,"NoMove"
+if the game is over, return result,"First",None
+if have winning move, return True,winning_move,None
+else return have_draw,"NoMove",draw_move
+raises SolverTimeout if time.time() passes deadline,
+the board is left in the middle of the search then.
+Results of positions are kept in table, a fresh
+transposition.TranspositionTable if None, and the best and killer
+moves in picker, a fresh MovePicker if None. Both only hold results
+of finished searches, so they can be passed to the next solve even
+after a timeout to continue from there.
+root_offset rotates the order of the root moves.
 """
-def solve(board):
-    result=game_end(board)
+def solve(board,deadline=None,table=None,root_offset=0,picker=None):
+    stats=search_stats.current
+    if stats is not None:
+        stats.node(0)
+    if picker is None:
+        picker=MovePicker()
+    result=root_result(board,picker)
     if (result!=None):
-        return result,"First"
+        return result
+    if table is None:
+        table=TranspositionTable()
     alpha,beta=-1,1
     haveDraw=False
-    solvePoint=board.list_solve_point()
-    if solvePoint:
-        #print(solvePoint[0])
-        board.play_move_gomoku(solvePoint[0],board.current_player)
-        result=-alphabeta(board,-beta,-alpha)
-        undo(board,solvePoint[0])
+    drawMove=None
+    moves=picker.moves(board,0)
+    if root_offset:
+        moves=list(moves)
+        moves=moves[root_offset%len(moves):]+moves[:root_offset%len(moves)]
+    for m in moves:
+        board.play_move_gomoku(m,board.current_player)
+        result=-alphabeta(board,-beta,-alpha,1,picker,deadline,table)
+        #print(GoBoardUtil.get_twoD_board(board))
+        #print(result)
+        undo(board,m)
         if(result==1):
-            return True,solvePoint[0]
-        elif(result==0):
+            return True,m,None
+        elif(result==0 and not haveDraw):
             haveDraw=True
-    else: 
-        for m in GoBoardUtil.generate_legal_moves_gomoku(board):
-            board.play_move_gomoku(m,board.current_player)
-            result=-alphabeta(board,-beta,-alpha)
-            #print(GoBoardUtil.get_twoD_board(board))
-            #print(result)
-            undo(board,m)
-            if(result==1):
-                return True,m
-            elif(result==0):
-                haveDraw=True
-    return haveDraw,"NoMove"
+            drawMove=m
+    return haveDraw,"NoMove",drawMove
+
+def _solve_worker(board,index,table,picker,results):
+    # the table is left to the parent, which frees it
+    random_source.seed(index)
+    try:
+        results.put(solve(board,table=table,root_offset=index,picker=picker))
+    except Exception as e:
+        results.put(e)
+
+"""
+Lazy SMP: processes solver processes search the same root at once,
+each starting with another root move and with other random move orders,
+and share a transposition.SharedTranspositionTable. The first finished
+search gives the result, in the format of solve, and the others are
+stopped. raises SolverTimeout if time.time() passes deadline.
+table and picker are as in solve. The shared table starts with the
+entries of table, and they are copied back when the search ends.
+"""
+def parallel_solve(board,processes,deadline=None,table_size=1<<20,table=None,picker=None):
+    if processes<=1:
+        return solve(board,deadline,table=table,picker=picker)
+    result=root_result(board,picker or MovePicker())
+    if (result!=None):
+        return result
+    shared=SharedTranspositionTable(table_size)
+    if table is not None:
+        shared.update(table)
+    results=multiprocessing.Queue()
+    workers=[multiprocessing.Process(target=_solve_worker,args=(board.copy(),i,shared,picker,results),
+                                     daemon=True)
+             for i in range(processes)]
+    try:
+        for worker in workers:
+            worker.start()
+        failures=0
+        while True:
+            timeout=None if deadline is None else max(deadline-time.time(),0)
+            try:
+                result=results.get(timeout=timeout)
+            except queue.Empty:
+                raise SolverTimeout
+            if not isinstance(result,Exception):
+                return result
+            failures+=1
+            if failures==processes:
+                raise result
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+        if table is not None:
+            shared.copy_to(table)
+        shared.close()
 
 
     """
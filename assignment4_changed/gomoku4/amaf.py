@@ -0,0 +1,52 @@
+"""
+amaf.py
+
+All-moves-as-first (AMAF) statistics for the Monte Carlo players.
+
+After a playout from the root, every point the root color played,
+the root move and its own playout moves, is credited with the playout
+result as if it had been played first. The statistics are kept in flat
+arrays indexed by board point. RAVE blends them with the direct win
+rate of a root move, weighting the AMAF value by
+    beta = sqrt(equivalence / (3 * visits + equivalence))
+so it dominates while a move has few playouts and fades out later.
+"""
+
+import numpy as np
+
+class AmafStats(object):
+
+    def __init__(self, maxpoint, equivalence):
+        """
+        maxpoint: size of the board array
+        equivalence: number of playouts at which the direct and the AMAF
+            value have about equal weight
+        """
+        self.wins = np.zeros(maxpoint)
+        self.visits = np.zeros(maxpoint)
+        self.equivalence = equivalence
+
+    def update(self, root_color_moves, result):
+        """
+        Credit result (for the root color) to all points in
+        root_color_moves. Stones are never removed in Gomoku,
+        so every point occurs at most once.
+        """
+        points = np.asarray(root_color_moves, dtype = np.int64)
+        self.wins[points] += result
+        self.visits[points] += 1
+
+    def blend(self, points, wins, visits):
+        """
+        RAVE value of the root moves points with direct statistics
+        wins and visits (arrays in the order of points).
+        -inf for moves without any statistics.
+        """
+        amaf_wins = self.wins[points]
+        amaf_visits = self.visits[points]
+        direct = wins / np.maximum(visits, 1)
+        amaf = amaf_wins / np.maximum(amaf_visits, 1)
+        beta = np.where(amaf_visits > 0,
+                        np.sqrt(self.equivalence / (3 * visits + self.equivalence)), 0.0)
+        value = (1 - beta) * direct + beta * amaf
+        return np.where((visits > 0) | (amaf_visits > 0), value, -np.inf)
@@ -0,0 +1,37 @@
+"""
+evaluation.py
+
+Static evaluation of Gomoku positions, used to score truncated playouts.
+
+An evaluator takes a board and returns the expected result for the
+player to move, a value in [-1, 1] like the result of a full playout.
+
+    threats   the best attack score of the player to move against its
+              best defend score (the strongest opponent line it could
+              block), from evaluate_move_on_attack and
+              evaluate_move_on_defend. The scores grow about tenfold per
+              stone in a line, so their log10 difference is mapped to a
+              win probability p with a logistic curve of width scale,
+              and 2 * p - 1 is returned.
+    draw      every truncated playout counts as a draw
+"""
+
+import math
+from scan_scores import score_moves
+
+def threats(board, scale=1.0):
+    moves = board.get_empty_points()
+    if len(moves) == 0:
+        return 0.0
+    attack, defend = score_moves(board, moves)
+    advantage = math.log10(1 + max(attack.max(), 0)) - math.log10(1 + max(defend.max(), 0))
+    win_probability = 1 / (1 + math.exp(-advantage / scale))
+    return 2 * win_probability - 1
+
+def draw(board, scale=1.0):
+    return 0.0
+
+EVALUATORS = {
+    "threats": threats,
+    "draw": draw
+}
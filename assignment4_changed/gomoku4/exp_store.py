@@ -0,0 +1,186 @@
+"""
+exp_store.py
+
+Bounded on-disk experience table for Gomoku4.
+
+For every position searched by get_move the playout statistics
+(wins and visits of each move) are kept in an SQLite database.
+Updates are collected in memory and written by a background thread
+in batches, each batch in one transaction, so a crash never leaves a
+half written file and get_move never waits for the disk.
+When the table holds more than `capacity` positions, the least
+recently used positions with the fewest visits are evicted. A position
+counts as used when it is recorded or found by lookup.
+"""
+
+import atexit
+import hashlib
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER PRIMARY KEY,
+    visits INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS moves (
+    key INTEGER NOT NULL,
+    move INTEGER NOT NULL,
+    wins REAL NOT NULL,
+    visits INTEGER NOT NULL,
+    PRIMARY KEY (key, move)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS positions_by_use ON positions (last_used, visits);
+"""
+
+def position_key(board):
+    """
+    Hash of the stones and the player to move that is the same in every run,
+    unlike hash() of bytes which changes with PYTHONHASHSEED.
+    """
+    digest = hashlib.blake2b(board.board.tobytes(), digest_size=8,
+                             person=bytes([board.current_player])).digest()
+    return int.from_bytes(digest, 'little', signed=True)
+
+class ExperienceStore(object):
+
+    def __init__(self, path, capacity=50000, flush_interval=1.0):
+        """
+        path: the SQLite file
+        capacity: maximum number of positions kept
+        flush_interval: seconds between two batched writes
+        """
+        self.path = path
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._writing = {}
+        self._touched = set()
+        self._reader = None
+        self._writer = None
+        self._wake = threading.Event()
+        self._flushed = threading.Condition(self._lock)
+        self._closed = False
+        self.evicted = 0
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def lookup(self, key):
+        """
+        Return the (wins, visits) dictionaries {move: value} of position key.
+        Both are empty for an unknown position.
+        """
+        with self._lock:
+            stats = self._pending.get(key) or self._writing.get(key)
+            if stats is not None:
+                return dict(stats[0]), dict(stats[1])
+            if self._reader is None:
+                self._reader = self._connect()
+            rows = self._reader.execute(
+                "SELECT move, wins, visits FROM moves WHERE key = ?", (key,)).fetchall()
+            if rows and not self._closed:
+                # last_used is updated with the next batch
+                self._touched.add(key)
+                self._start_writer()
+        wins = {move: w for move, w, _ in rows}
+        visits = {move: n for move, _, n in rows}
+        return wins, visits
+
+    def record(self, key, wins, visits):
+        """
+        Store the statistics of position key. The write happens later
+        in the background thread.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._pending[key] = (dict(wins), dict(visits))
+            self._start_writer()
+
+    def _start_writer(self):
+        if self._writer is None and not self._closed:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def flush(self):
+        """ Wait until all recorded statistics are written """
+        with self._lock:
+            if self._writer is None:
+                return
+            self._wake.set()
+            while self._pending or self._writing or self._touched:
+                self._flushed.wait()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            writer = self._writer
+        if writer is not None:
+            self._wake.set()
+            writer.join()
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+    def _write_loop(self):
+        connection = self._connect()
+        try:
+            while True:
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                with self._lock:
+                    batch = self._writing = self._pending
+                    self._pending = {}
+                    touched = self._touched - batch.keys()
+                    self._touched = set()
+                    closed = self._closed
+                if batch or touched:
+                    self._write_batch(connection, batch, touched)
+                with self._lock:
+                    self._writing = {}
+                    self._flushed.notify_all()
+                    if closed and not self._pending and not self._touched:
+                        break
+        finally:
+            connection.close()
+
+    def _write_batch(self, connection, batch, touched=()):
+        now = time.time()
+        with connection:
+            connection.executemany("UPDATE positions SET last_used = ? WHERE key = ?",
+                                   [(now, key) for key in touched])
+            for key, (wins, visits) in batch.items():
+                connection.execute(
+                    "INSERT INTO positions (key, visits, last_used) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET visits = excluded.visits, "
+                    "last_used = excluded.last_used",
+                    (key, sum(visits.values()), now))
+                connection.executemany(
+                    "INSERT INTO moves (key, move, wins, visits) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key, move) DO UPDATE SET wins = excluded.wins, "
+                    "visits = excluded.visits",
+                    [(key, int(move), wins[move], visits[move]) for move in visits])
+            self._evict(connection)
+
+    def _evict(self, connection):
+        count = connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        excess = count - self.capacity
+        if excess <= 0:
+            return
+        # oldest first, among equally old ones the least visited first
+        victims = connection.execute(
+            "SELECT key FROM positions ORDER BY last_used, visits LIMIT ?",
+            (excess,)).fetchall()
+        connection.executemany("DELETE FROM moves WHERE key = ?", victims)
+        connection.executemany("DELETE FROM positions WHERE key = ?", victims)
+        self.evicted += len(victims)
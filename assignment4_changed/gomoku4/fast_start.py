@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+"""
+fast_start.py
+
+Startup-optimized entry point for Gomoku4.
+
+Importing the engine pulls in NumPy and the rest of the engine, which
+takes far longer than starting the interpreter. Here the engine modules
+are imported in a background thread while the first commands are read.
+protocol_version, name, version and boardsize are answered right away
+from the constants below; the first other command waits until the
+engine is loaded and from then on every command goes to GtpConnection.
+With --pipelined its responses are buffered and written when no more
+input is waiting, with --ponder it searches on the opponent's time.
+Only the standard library modules sys, select and threading are
+imported here.
+"""
+
+import select
+import sys
+import threading
+
+ENGINE_NAME = "Gomoku4"    # must match GomokuSimulationPlayer.name
+ENGINE_VERSION = 3.0       # must match GomokuSimulationPlayer.version
+MAXSIZE = 25               # board_util.MAXSIZE
+
+class FastStart(object):
+
+    def __init__(self):
+        self.con = None
+        self.size = None
+        self.pipelined = "--pipelined" in sys.argv[1:]
+        self.engine_module = None
+        self.loaded = threading.Event()
+        threading.Thread(target=self._import_engine, daemon=True).start()
+
+    def _import_engine(self):
+        try:
+            import Gomoku4
+            self.engine_module = Gomoku4
+        finally:
+            self.loaded.set()
+
+    def respond(self, response=''):
+        sys.stdout.write('= {}\n\n'.format(response))
+        sys.stdout.flush()
+
+    def error(self, error_msg):
+        sys.stdout.write('? {}\n\n'.format(error_msg))
+        sys.stdout.flush()
+
+    def answer_early(self, command):
+        """
+        Answer command without the engine if possible.
+        Returns False if the command needs the engine.
+        """
+        elements = command.split()
+        if elements and elements[0].isdigit():
+            elements = elements[1:]
+        if not elements:
+            return False
+        name, args = elements[0], elements[1:]
+        if name == "protocol_version":
+            self.respond('2')
+        elif name == "name":
+            self.respond(ENGINE_NAME)
+        elif name == "version":
+            self.respond(ENGINE_VERSION)
+        elif name == "boardsize" and len(args) == 1:
+            try:
+                size = int(args[0])
+            except ValueError:
+                return False
+            if not 2 <= size <= MAXSIZE:
+                return False
+            self.size = size
+            self.respond()
+        else:
+            return False
+        return True
+
+    def connect(self):
+        """ Wait for the engine and create the GtpConnection """
+        self.loaded.wait()
+        if self.engine_module is None:
+            raise ImportError("could not load the Gomoku4 engine")
+        self.con = self.engine_module.make_connection(pipelined = self.pipelined,
+                                                      ponder = "--ponder" in sys.argv[1:])
+        if self.size is not None:
+            self.con.reset(self.size)
+
+    def start_connection(self):
+        line = sys.stdin.readline()
+        while line:
+            if self.con is None and not self.answer_early(line):
+                self.connect()
+            if self.con is not None:
+                self.con.get_cmd(line)
+                if self.pipelined and not select.select([sys.stdin], [], [], 0)[0]:
+                    self.con.flush()
+            line = sys.stdin.readline()
+        if self.con is not None:
+            self.con.flush()
+
+if __name__=='__main__':
+    FastStart().start_connection()
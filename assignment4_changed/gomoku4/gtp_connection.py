@@ -7,16 +7,24 @@ in the Deep-Go project by Isaac Henrion and Amos Storkey
 at the University of Edinburgh.
 """
 import traceback
+import codecs
+from profiler import CommandProfiler
+import os
+import select
 from sys import stdin, stdout, stderr
 from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, PASS, \
                        MAXSIZE, coord_to_point
-import numpy as np
 import re
 import signal
+import root_allocation
+import random_source
+import evaluation
+import threading
+import search_stats
 
 class GtpConnection():
 
-    def __init__(self, go_engine, board, debug_mode = False):
+    def __init__(self, go_engine, board, debug_mode = False, pipelined = False):
         """
         Manage a GTP connection for a Go-playing engine
 
@@ -26,11 +34,16 @@ class GtpConnection():
             a program that can reply to a set of GTP commandsbelow
         board: 
             Represents the current board state.
+        pipelined:
+            read stdin in large chunks and buffer the responses,
+            see start_pipelined_connection
         """
         self._debug_mode = debug_mode
+        self._pipelined = pipelined
+        self._output = []
         self.go_engine = go_engine
         self.board = board
-        signal.signal(signal.SIGALRM, self.handler)
+        self.install_alarm_handler()
         self.commands = {
             "protocol_version": self.protocol_version_cmd,
             "quit": self.quit_cmd,
@@ -56,9 +69,34 @@ class GtpConnection():
             "solve": self.solve_cmd,
             "list_solve_point": self.list_solve_point_cmd, # below is added for Gomoku3
             "policy": self.set_playout_policy, 
-            "policy_moves": self.display_pattern_moves
+            "policy_moves": self.display_pattern_moves,
+            "root_policy": self.root_policy_cmd,
+            "rave": self.rave_cmd,
+            "seed": self.seed_cmd,
+            "playout_cutoff": self.playout_cutoff_cmd,
+            "evaluator": self.evaluator_cmd,
+            "setup": self.setup_cmd,
+            "loadpos": self.loadpos_cmd,
+            "search_stats": self.search_stats_cmd,
+            "search_stats_mode": self.search_stats_mode_cmd,
+            "policy_cache": self.policy_cache_cmd,
+            "solver_table": self.solver_table_cmd,
+            "profile": self.profile_cmd,
+            "profile_summary": self.profile_summary_cmd,
+            "ponder": self.ponder_cmd
         }
+        self.profiler = CommandProfiler.from_environment()
+        self.profiled_commands = {"genmove", "solve"}
         self.timelimit=60
+        self._search_log = False
+        # search on the opponent's time after genmove, see start_pondering
+        self.pondering = False
+        self._ponder_thread = None
+        self._ponder_stop = None
+
+        # commands that may think for a long time. In pipelined mode
+        # the buffered responses are sent before running them
+        self.long_commands = {"genmove", "solve"}
 
         # used for argument checking
         # values: (required number of arguments, 
@@ -70,7 +108,13 @@ class GtpConnection():
             "genmove": (1, 'Usage: genmove {w,b}'),
             "play": (2, 'Usage: play {b,w} MOVE'),
             "legal_moves": (1, 'Usage: legal_moves {w,b}'),
-            "policy":(1, 'Usage: set playout policy {random, rule_based}')
+            "policy":(1, 'Usage: set playout policy {random, rule_based}'),
+            "root_policy": (1, 'Usage: root_policy {round_robin,sequential_halving,ucb1}'),
+            "seed": (1, 'Usage: seed INT'),
+            "rave": (1, 'Usage: rave EQUIVALENCE (0 is off)'),
+            "playout_cutoff": (1, 'Usage: playout_cutoff MOVES (0 is off)'),
+            "search_stats_mode": (1, 'Usage: search_stats_mode {off,on,log}'),
+            "ponder": (1, 'Usage: ponder {on,off}')
         }
     
     def set_playout_policy(self, args):
@@ -78,6 +122,82 @@ class GtpConnection():
         self.go_engine.set_playout_policy(playout_policy)
         self.respond()
 
+    def root_policy_cmd(self, args):
+        """ How genmove spreads its playouts over the moves, see root_allocation """
+        if args[0] not in root_allocation.ALLOCATORS:
+            self.error('Usage: root_policy {round_robin,sequential_halving,ucb1}')
+            return
+        self.go_engine.root_policy = args[0]
+        self.respond()
+
+    def rave_cmd(self, args):
+        """
+        rave N: blend the AMAF statistics into the move values,
+        with equal weight at N playouts of a move. rave 0 turns it off.
+        """
+        try:
+            equivalence = int(args[0])
+        except ValueError:
+            equivalence = -1
+        if equivalence < 0:
+            self.error('Usage: rave EQUIVALENCE (0 is off)')
+            return
+        self.go_engine.rave_equivalence = equivalence
+        self.respond()
+
+    def playout_cutoff_cmd(self, args):
+        """
+        playout_cutoff K: stop the playouts at the first quiet position
+        after K moves and score it with the evaluator. 0 plays to the end.
+        """
+        try:
+            cutoff = int(args[0])
+        except ValueError:
+            cutoff = -1
+        if cutoff < 0:
+            self.error('Usage: playout_cutoff MOVES (0 is off)')
+            return
+        self.go_engine.playout_cutoff = cutoff
+        self.respond()
+
+    def evaluator_cmd(self, args):
+        """
+        evaluator [NAME [SCALE]]: the static evaluation of truncated
+        playouts, see evaluation. Without arguments shows the current one.
+        """
+        usage = 'Usage: evaluator [{%s} [SCALE]]' % ','.join(evaluation.EVALUATORS)
+        if len(args) == 0:
+            self.respond('{} {}'.format(self.go_engine.evaluator,
+                                        self.go_engine.evaluation_scale))
+            return
+        if args[0] not in evaluation.EVALUATORS or len(args) > 2:
+            self.error(usage)
+            return
+        scale = self.go_engine.evaluation_scale
+        if len(args) == 2:
+            try:
+                scale = float(args[1])
+            except ValueError:
+                scale = 0
+            if scale <= 0:
+                self.error(usage)
+                return
+        self.go_engine.evaluator = args[0]
+        self.go_engine.evaluation_scale = scale
+        self.respond()
+
+    def seed_cmd(self, args):
+        """
+        seed N: restart the random numbers of the playouts and move
+        generators with seed N, see random_source
+        """
+        try:
+            random_source.seed(int(args[0]))
+        except ValueError:
+            self.error('Usage: seed INT')
+            return
+        self.respond()
+
     def display_pattern_moves(self, args):
         game_end, winner = self.board.check_game_end_gomoku()
         color=self.board.current_player
@@ -100,9 +220,21 @@ class GtpConnection():
         self.respond(moveType+' '+sorted_moves)
 
     def write(self, data):
-        stdout.write(data) 
+        if self._pipelined:
+            self._output.append(data)
+        else:
+            stdout.write(data) 
+
+    def take_output(self):
+        """ Remove and return the buffered responses of pipelined mode """
+        data = ''.join(self._output)
+        self._output = []
+        return data
 
     def flush(self):
+        if self._output:
+            stdout.write(''.join(self._output))
+            self._output = []
         stdout.flush()
 
     def start_connection(self):
@@ -110,11 +242,42 @@ class GtpConnection():
         Start a GTP connection. 
         This function continuously monitors standard input for commands.
         """
+        if self._pipelined:
+            self.start_pipelined_connection()
+            return
         line = stdin.readline()
         while line:
             self.get_cmd(line)
             line = stdin.readline()
 
+    def start_pipelined_connection(self, chunk_size = 65536):
+        """
+        Read standard input in large chunks and run all queued commands.
+        Responses are buffered and written with a single flush when
+        no more input is waiting, or before a command in long_commands.
+        """
+        fd = stdin.fileno()
+        # a character can be split between two chunks
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        pending = ''
+        try:
+            while True:
+                chunk = os.read(fd, chunk_size)
+                if not chunk:
+                    break
+                pending += decoder.decode(chunk)
+                lines = pending.split('\n')
+                pending = lines.pop()
+                for line in lines:
+                    self.get_cmd(line + '\n')
+                if not select.select([fd], [], [], 0)[0]:
+                    self.flush()
+            pending += decoder.decode(b'', final = True)
+            if pending:
+                self.get_cmd(pending)
+        finally:
+            self.flush()
+
     def get_cmd(self, command):
         """
         Parse command string and execute it
@@ -130,12 +293,18 @@ class GtpConnection():
         elements = command.split()
         if not elements:
             return
+        self.stop_pondering()
         command_name = elements[0]; args = elements[1:]
         if self.has_arg_error(command_name, len(args)):
             return
+        if self._pipelined and command_name in self.long_commands:
+            self.flush()
         if command_name in self.commands:
             try:
-                self.commands[command_name](args)
+                if self.profiler.enabled and command_name in self.profiled_commands:
+                    self.profiler.run(command_name, self.commands[command_name], args)
+                else:
+                    self.commands[command_name](args)
             except Exception as e:
                 self.debug_msg("Error executing command {}\n".format(str(e)))
                 self.debug_msg("Stack Trace:\n{}\n".
@@ -144,7 +313,68 @@ class GtpConnection():
         else:
             self.debug_msg("Unknown command: {}\n".format(command_name))
             self.error('Unknown command')
-            stdout.flush()
+
+    def ponder_cmd(self, args):
+        """ ponder on|off: search on the opponent's time after genmove """
+        mode = args[0].lower()
+        if mode not in ("on", "off"):
+            self.error('Usage: ponder {on,off}')
+            return
+        self.pondering = mode == "on"
+        self.respond()
+
+    def start_pondering(self):
+        """
+        Let the engine search the current position in a background
+        thread until the next command arrives.
+        """
+        if not self.pondering:
+            return
+        self._ponder_stop = threading.Event()
+        self._ponder_thread = threading.Thread(target = self.go_engine.ponder,
+                                               args = (self.board.copy(), self._ponder_stop),
+                                               daemon = True)
+        self._ponder_thread.start()
+
+    def stop_pondering(self):
+        """ Stop the pondering thread and wait until it has finished """
+        if self._ponder_thread is None:
+            return
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+
+    def profile_cmd(self, args):
+        """
+        profile on [DIR]: profile genmove and solve, writing to DIR
+        profile off: stop profiling
+        """
+        if not args or args[0].lower() not in ("on", "off") or len(args) > 2:
+            self.error('Usage: profile {on [DIR],off}')
+            return
+        if args[0].lower() == "on":
+            self.profiler.enable(args[1] if len(args) == 2 else None)
+            self.respond(self.profiler.directory)
+        else:
+            self.profiler.disable()
+            self.respond()
+
+    def profile_summary_cmd(self, args):
+        """
+        profile_summary [N] [TOP]: the TOP functions with the most own time
+        over the last N profiled commands
+        """
+        try:
+            last = int(args[0]) if len(args) > 0 else 10
+            top = int(args[1]) if len(args) > 1 else 15
+        except ValueError:
+            self.error('Usage: profile_summary [N] [TOP]')
+            return
+        lines = self.profiler.summary(last, top)
+        if not lines:
+            self.respond("no profiles")
+            return
+        self.respond('\n' + '\n'.join(lines))
 
     def has_arg_error(self, cmd, argnum):
         """
@@ -164,19 +394,22 @@ class GtpConnection():
 
     def error(self, error_msg):
         """ Send error msg to stdout """
-        stdout.write('? {}\n\n'.format(error_msg))
-        stdout.flush()
+        self.write('? {}\n\n'.format(error_msg))
+        if not self._pipelined:
+            self.flush()
 
     def respond(self, response=''):
         """ Send response to stdout """
-        stdout.write('= {}\n\n'.format(response))
-        stdout.flush()
+        self.write('= {}\n\n'.format(response))
+        if not self._pipelined:
+            self.flush()
 
     def reset(self, size):
         """
         Reset the board to empty board of given size
         """
         self.board.reset(size)
+        self.go_engine.policy_cache.clear()
 
     def board2d(self):
         return str(GoBoardUtil.get_twoD_board(self.board))
@@ -188,6 +421,7 @@ class GtpConnection():
     def quit_cmd(self, args):
         """ Quit game and exit the GTP interface """
         self.respond()
+        self.flush()
         exit()
 
     def name_cmd(self, args):
@@ -273,28 +507,239 @@ class GtpConnection():
             if not self.board.play_move_gomoku(move, color):
                 self.respond("illegal move: \"{}\" occupied".format(board_move))
                 return
-            else:
+            elif self._debug_mode:
                 self.debug_msg("Move: {}\nBoard:\n{}\n".
                                 format(board_move, self.board2d()))
             self.respond()
         except Exception as e:
             self.respond('{}'.format(str(e)))
 
+    def setup_cmd(self, args):
+        """
+        Play a whole list of moves in one command, e.g.
+        setup b D4 w C3 b E5
+        A move without a color is played by the side to move.
+        Nothing is played if any move is illegal, or if moves follow
+        one that ends the game.
+        """
+        board = self.board.copy()
+        color = None
+        game_over = False
+        for arg in args:
+            if game_over:
+                self.error("illegal move: \"{}\" game is over".format(arg))
+                return
+            if arg.lower() in ("b", "w"):
+                color = color_to_int(arg.lower())
+                continue
+            if color is None:
+                color = board.current_player
+            try:
+                coord = move_to_coord(arg, board.size)
+            except ValueError as e:
+                self.error(str(e))
+                return
+            if coord == PASS:
+                self.error("illegal move: \"{}\" pass in setup".format(arg))
+                return
+            move = coord_to_point(coord[0], coord[1], board.size)
+            if not board.play_move_gomoku(move, color):
+                self.error("illegal move: \"{}\" occupied".format(arg))
+                return
+            game_over = board.point_check_game_end_gomoku(move) or \
+                        len(board.get_empty_points()) == 0
+            color = None
+        if color is not None:
+            self.error('Usage: setup [b|w] MOVE [[b|w] MOVE ...]')
+            return
+        self.board = board
+        if self._debug_mode:
+            self.debug_msg("Setup:\n{}\n".format(self.board2d()))
+        self.respond()
+
+    def loadpos_cmd(self, args):
+        """
+        Load a position from a compact board string, e.g.
+        loadpos ..X/.O./... [b|w]
+        Rows are given from the top row down, as in gogui-rules_board,
+        and separated by '/'. X is black, O is white, '.' is empty.
+        Without a color, black is to play if both have the same
+        number of stones.
+        """
+        if not 1 <= len(args) <= 2:
+            self.error('Usage: loadpos ROW/ROW/... [b|w]')
+            return
+        rows = args[0].split('/')
+        size = len(rows)
+        if not 2 <= size <= MAXSIZE or any(len(row) != size for row in rows):
+            self.error("loadpos: board must be square")
+            return
+        stones = {"x": BLACK, "o": WHITE, ".": EMPTY}
+        board = self.board.copy()
+        board.reset(size)
+        num_stones = {BLACK: 0, WHITE: 0, EMPTY: 0}
+        for i, row in enumerate(rows):
+            for j, c in enumerate(row.lower()):
+                if c not in stones:
+                    self.error("loadpos: unknown point \"{}\"".format(c))
+                    return
+                color = stones[c]
+                num_stones[color] += 1
+                if color != EMPTY and \
+                   not board.play_move_gomoku(coord_to_point(size - i, j + 1, size), color):
+                    self.error("loadpos: illegal point \"{}\"".format(c))
+                    return
+        if len(args) == 2:
+            if args[1].lower() not in ("b", "w"):
+                self.error('Usage: loadpos ROW/ROW/... [b|w]')
+                return
+            board.current_player = color_to_int(args[1].lower())
+        elif num_stones[BLACK] == num_stones[WHITE]:
+            board.current_player = BLACK
+        else:
+            board.current_player = WHITE
+        self.board = board
+        if self._debug_mode:
+            self.debug_msg("Position:\n{}\n".format(self.board2d()))
+        self.respond()
+
     def timelimit_cmd(self, args):
         self.timelimit = args[0]
         self.respond('')
 
+    def install_alarm_handler(self):
+        signal.signal(signal.SIGALRM, self.handler)
+
     def handler(self, signum, fram):
         self.board = self.sboard
         raise TimeoutError
 
-    def solve_cmd(self, args):
+    def timed_solve(self, timelimit, processes=1):
+        """
+        Solve the current position with processes solver processes,
+        interrupted by SIGALRM after timelimit seconds.
+        Raises TimeoutError when the time is up.
+        """
+        self.sboard = self.board.copy()
+        signal.alarm(timelimit)
+        result = self.board.solve(processes, self.go_engine.solver_table,
+                                  self.go_engine.solver_picker)
+        self.board = self.sboard
+        signal.alarm(0)
+        return result
+
+    def timed_get_move(self, color, timelimit):
+        """
+        Ask the engine for a move, interrupted by SIGALRM after
+        timelimit seconds. Returns the engine's best move so far
+        when the time is up.
+        """
+        self.go_engine.timelimit = timelimit
         try:
+            signal.alarm(timelimit)
             self.sboard = self.board.copy()
-            signal.alarm(int(self.timelimit)-1)
-            winner,move = self.board.solve()
-            self.board = self.sboard
+            move = self.go_engine.get_move(self.board, color)
+            self.board=self.sboard
             signal.alarm(0)
+        except TimeoutError as e:
+            move=self.go_engine.best_move
+        return move
+
+    def solver_table_cmd(self, args):
+        """
+        solver_table: number of positions and file of the solver table
+        solver_table clear: forget all solver results
+        solver_table file PATH: load the table saved in PATH and save
+            it there after every solve
+        solver_table file: stop saving the table
+        """
+        engine = self.go_engine
+        if len(args) == 0:
+            self.respond("entries {} file {}".format(len(engine.solver_table),
+                                                      engine.solver_table_path))
+        elif args == ["clear"]:
+            engine.clear_solver_table()
+            self.respond()
+        elif args[0] == "file" and len(args) <= 2:
+            try:
+                engine.use_solver_table(args[1] if len(args) == 2 else None)
+            except (OSError, ValueError) as e:
+                self.error("cannot load solver table: {}".format(e))
+                return
+            self.respond()
+        else:
+            self.error('Usage: solver_table [clear | file [PATH]]')
+
+    def policy_cache_cmd(self, args):
+        """ Size and hit rate of the rule-based policy cache since the last clear_board """
+        cache = self.go_engine.policy_cache
+        self.respond("size {} hits {} misses {} hit_rate {:.3f}".format(
+            len(cache.entries), cache.hits, cache.misses, cache.hit_rate()))
+
+    def search_stats_mode_cmd(self, args):
+        """
+        off: no statistics, on: collect statistics for search_stats,
+        log: also write them to stderr after every genmove and solve
+        """
+        mode = args[0].lower()
+        if mode not in ("off", "on", "log"):
+            self.error('Usage: search_stats_mode {off,on,log}')
+            return
+        self.enable_stats(mode != "off")
+        self._search_log = (mode == "log")
+        self.respond()
+
+    def enable_stats(self, enabled):
+        if enabled:
+            search_stats.enable()
+        else:
+            search_stats.disable()
+
+    def current_stats(self):
+        """ The SearchStats of this connection, None if disabled """
+        return search_stats.current
+
+    def search_stats_cmd(self, args):
+        """ Statistics of the last genmove or solve """
+        stats = self.current_stats()
+        if stats is None:
+            self.respond("disabled")
+            return
+        self.respond(stats.format())
+
+    def begin_search(self):
+        stats = self.current_stats()
+        if stats is not None:
+            stats.reset()
+        return stats
+
+    def end_search(self, name, stats):
+        if stats is None:
+            return
+        stats.stop()
+        if self._search_log:
+            stderr.write("{}: {}\n".format(name, stats.format(' ')))
+            stderr.flush()
+
+    def solve_cmd(self, args):
+        """
+        solve [N]: solve the position, with N solver processes
+        sharing a transposition table if N > 1
+        """
+        processes = 1
+        if args:
+            try:
+                processes = int(args[0])
+            except ValueError:
+                processes = 0
+            if processes < 1 or len(args) > 1:
+                self.error('Usage: solve [PROCESSES]')
+                return
+        stats = self.begin_search()
+        try:
+            winner,move = self.timed_solve(int(self.timelimit)-1, processes)
+            self.end_search("solve", stats)
+            self.go_engine.save_solver_table()
             if move != "NoMove":
                 if move == None:
                     self.respond('{} {}'.format(winner, self.board._point_to_coord(move)))
@@ -302,8 +747,11 @@ class GtpConnection():
                 self.respond('{} {}'.format(winner, format_point(point_to_coord(move, self.board.size))))
                 return 
             self.respond('{}'.format(winner))
-        except TimeoutError as e:
-            self.respond('{}'.format(str(e)))
+        except TimeoutError:
+            self.end_search("solve", stats)
+            # the next solve continues from what was learned
+            self.go_engine.save_solver_table()
+            self.respond('unknown')
 
     def genmove_cmd(self, args):
         """
@@ -328,17 +776,12 @@ class GtpConnection():
         move=None
         # The following will be the thinking process for 60 sec before making 
         # decision to take which action
-        try:
-            timelimit = int(self.timelimit)
-            if timelimit > 1:
-                timelimit -= 1
-            signal.alarm(timelimit)
-            self.sboard = self.board.copy()
-            move = self.go_engine.get_move(self.board, color)
-            self.board=self.sboard
-            signal.alarm(0)
-        except TimeoutError as e:
-            move=self.go_engine.best_move
+        timelimit = int(self.timelimit)
+        if timelimit > 1:
+            timelimit -= 1
+        stats = self.begin_search()
+        move = self.timed_get_move(color, timelimit)
+        self.end_search("genmove", stats)
 
         if move == PASS:
             self.respond("pass")
@@ -348,6 +791,7 @@ class GtpConnection():
         if self.board.is_legal_gomoku(move, color):
             self.board.play_move_gomoku(move, color)
             self.respond(move_as_string)
+            self.start_pondering()
         else:
             self.respond("illegal move: {}".format(move_as_string))
 
@@ -425,6 +869,8 @@ class GtpConnection():
                      "pstring/Board Size/gogui-rules_board_size\n"
                      "pstring/Rules GameID/gogui-rules_game_id\n"
                      "pstring/Show Board/gogui-rules_board\n"
+                     "pstring/Search Statistics/search_stats\n"
+                     "pstring/Policy Cache/policy_cache\n"
                      )
 
     def list_solve_point_cmd(self, args):
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+"""
+gtp_regress.py
+
+In-process regression runner for .gtp test files.
+
+Every file is fed line by line into GtpConnection.get_cmd of a fresh
+Gomoku4 engine with an empty experience store; the responses are taken
+from the output buffer, so no subprocess and no removeSpace.py are
+needed. A numbered command followed by a line `#?[EXPECTED]` is checked
+against EXPECTED, a regular expression that must match the whole
+response, e.g. `#?[b C1]` or `#?[draw G1|draw G5]`.
+An expectation ending in `*` marks a known failure.
+
+The wall time of every numbered command is recorded and compared with
+a saved baseline to flag latency regressions. The baseline is keyed by
+the path of each file relative to this directory, so it does not depend
+on where the runner is started from.
+
+Usage:
+    python3 gtp_regress.py FILE.gtp ... [--workers N]
+                           [--baseline regress_baseline.json] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from gtp_connection import GtpConnection
+from simple_board import SimpleGoBoard
+from Gomoku4 import GomokuSimulationPlayer
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+class RegressionConnection(GtpConnection):
+    """
+    GtpConnection that keeps its responses in the output buffer.
+    """
+
+    def __init__(self, go_engine, board):
+        GtpConnection.__init__(self, go_engine, board, pipelined = True)
+
+    def flush(self):
+        pass
+
+    def quit_cmd(self, args):
+        self.respond()
+
+def parse_response(output):
+    """ Strip the '= ' or '? ' and the trailing blank line of a response """
+    output = output.strip()
+    if output[:1] in ('=', '?'):
+        return output[0], output[1:].strip()
+    return '', output
+
+def run_file(path):
+    """
+    Run one .gtp file. Returns a dictionary with the results of
+    the numbered commands:
+    {id: {"command", "response", "expected", "passed", "known_failure", "seconds"}}
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        engine = GomokuSimulationPlayer(exp_path = os.path.join(directory, "exp.db"))
+        try:
+            return _run_commands(RegressionConnection(engine, SimpleGoBoard(7)), path)
+        finally:
+            engine.exp.close()
+
+def _run_commands(con, path):
+    results = {}
+    last_id = None
+    with open(path) as f:
+        for line in f:
+            stripped = line.strip()
+            if stripped.startswith('#?'):
+                match = re.match(r'#\?\s*\[(.*)\](\*?)\s*$', stripped)
+                if match is None or last_id is None:
+                    continue
+                expected, known_failure = match.group(1), match.group(2) == '*'
+                result = results[last_id]
+                result["expected"] = expected
+                result["known_failure"] = known_failure
+                result["passed"] = result["status"] == '=' and \
+                                   re.fullmatch(expected, result["response"]) is not None
+                continue
+            number = re.match(r'(\d+)\s+\S', stripped)
+            start = time.perf_counter()
+            try:
+                con.get_cmd(line)
+            except Exception as e:
+                con.error(str(e))
+            seconds = time.perf_counter() - start
+            status, response = parse_response(con.take_output())
+            if number:
+                last_id = number.group(1)
+                results[last_id] = {"command": stripped[number.end(1):].strip(),
+                                    "status": status,
+                                    "response": response, "seconds": seconds}
+    return results
+
+def check_results(results):
+    """ Return (passed, failed, known failures, unchecked) counts """
+    passed = failed = known = unchecked = 0
+    for result in results.values():
+        if "expected" not in result:
+            unchecked += 1
+        elif result["passed"]:
+            passed += 1
+        elif result["known_failure"]:
+            known += 1
+        else:
+            failed += 1
+    return passed, failed, known, unchecked
+
+def latency_regressions(path, results, baseline, tolerance, min_seconds):
+    """
+    Commands slower than their baseline time by more than the fraction
+    tolerance and by at least min_seconds.
+    """
+    regressions = []
+    for command_id, result in results.items():
+        base = baseline.get(path, {}).get(command_id)
+        if base is None:
+            continue
+        if result["seconds"] > base * (1 + tolerance) and \
+           result["seconds"] - base >= min_seconds:
+            regressions.append((command_id, base, result["seconds"]))
+    return regressions
+
+def run_files(paths, workers=None):
+    """ Run the files in parallel, returns {path: results} """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(zip(paths, pool.map(run_file, paths)))
+
+def baseline_key(path):
+    """ Name of the .gtp file at path in the baseline """
+    return os.path.relpath(os.path.abspath(path), HERE)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run .gtp regression files in-process")
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--baseline", default=None,
+                        help="JSON file with the command times of an earlier run")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed relative slowdown of a command")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    paths = [os.path.abspath(path) for path in args.files]
+    all_results = run_files(paths, args.workers)
+    baseline = {}
+    if args.baseline and not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    total_failed = 0
+    total_regressions = 0
+    for path in paths:
+        results = all_results[path]
+        name = baseline_key(path)
+        passed, failed, known, unchecked = check_results(results)
+        total_failed += failed
+        seconds = sum(result["seconds"] for result in results.values())
+        print("{}: {} passed, {} failed, {} known failures, {:.2f} s".format(
+              name, passed, failed, known, seconds))
+        for command_id, result in results.items():
+            if "expected" in result and not result["passed"]:
+                print("  {} {}{}: expected [{}] got [{}{}]".format(
+                      command_id, result["command"],
+                      " (known failure)" if result["known_failure"] else "",
+                      result["expected"], "? " if result["status"] == '?' else "",
+                      result["response"]))
+        for command_id, base, seconds in latency_regressions(
+                name, results, baseline, args.tolerance, args.min_seconds):
+            total_regressions += 1
+            print("  {} {}: {:.3f} s, baseline {:.3f} s".format(
+                  command_id, results[command_id]["command"], seconds, base))
+
+    if args.save_baseline and args.baseline:
+        times = {baseline_key(path): {command_id: result["seconds"]
+                                      for command_id, result in all_results[path].items()}
+                 for path in paths}
+        with open(args.baseline, "w") as f:
+            json.dump(times, f, indent=2, sort_keys=True)
+    if total_failed or total_regressions:
+        raise SystemExit(1)
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+"""
+gtp_server.py
+
+Asyncio GTP server that hosts many Gomoku4 engines in one interpreter.
+
+Every connection gets its own GtpSession with its own board and engine.
+Commands of a session run in a thread so a slow command does not block
+the other sessions. genmove and solve are sent to a process pool;
+each worker process keeps one engine and uses SIGALRM for the time limit,
+exactly like the stdin/stdout GtpConnection does.
+A worker runs the searches of all sessions, so it starts every search
+with an empty solver table. After seed N, every search of the session
+is sent with the seed [N, i] for its number i, so a worker restarts its
+random numbers from the same seed whichever worker runs the search.
+search_stats_mode is also kept per session: the workers collect the
+statistics of a search only if its session asked for them and send
+them back with the result.
+
+Usage:
+    python3 gtp_server.py --port 9000 [--host 127.0.0.1] [--workers 4]
+    python3 gtp_server.py --unix /tmp/gomoku4.sock
+"""
+
+import argparse
+import asyncio
+import signal
+from concurrent.futures import ProcessPoolExecutor
+
+from gtp_connection import GtpConnection
+from simple_board import SimpleGoBoard
+from Gomoku4 import GomokuSimulationPlayer
+import random_source
+import search_stats
+from search_stats import SearchStats
+
+"""
+Worker process side: one engine per worker process.
+"""
+_worker_engine = None
+
+def _alarm_handler(signum, frame):
+    raise TimeoutError
+
+def _init_worker():
+    global _worker_engine
+    _worker_engine = GomokuSimulationPlayer()
+    # forked workers would otherwise share the random numbers of the server
+    random_source.seed()
+    signal.signal(signal.SIGALRM, _alarm_handler)
+
+def _start_job(seed, stats=False):
+    """
+    Forget the solver results of earlier jobs, which may be of other
+    sessions, and restart the random numbers with the seed of the job
+    if it has one.
+    Returns a new SearchStats for the job if stats, else None.
+    """
+    _worker_engine.clear_solver_table()
+    if seed is not None:
+        random_source.seed(seed)
+    search_stats.disable()
+    if stats:
+        return search_stats.enable()
+    return None
+
+def _apply_settings(settings):
+    for name, value in settings.items():
+        setattr(_worker_engine, name, value)
+
+def worker_get_move(board, color, timelimit, settings, stats=False, seed=None):
+    """
+    Run get_move in a worker process.
+    Returns the best move found within timelimit seconds and the
+    statistics of the search if stats, else None.
+    """
+    collected = _start_job(seed, stats)
+    _apply_settings(settings)
+    _worker_engine.best_move = None
+    _worker_engine.timelimit = timelimit
+    try:
+        signal.alarm(timelimit)
+        move = _worker_engine.get_move(board, color)
+    except TimeoutError:
+        move = _worker_engine.best_move
+    finally:
+        signal.alarm(0)
+    return move, collected
+
+def worker_solve(board, timelimit, processes=1, stats=False, seed=None):
+    """
+    Run the solver in a worker process.
+    Returns the result of board.solve, or None if the time is up,
+    and the statistics of the search if stats, else None.
+    """
+    collected = _start_job(seed, stats)
+    try:
+        signal.alarm(timelimit)
+        result = board.solve(processes, _worker_engine.solver_table,
+                             _worker_engine.solver_picker)
+    except TimeoutError:
+        result = None
+    finally:
+        signal.alarm(0)
+    return result, collected
+
+class GtpSession(GtpConnection):
+    """
+    A GtpConnection bound to one client connection instead of stdin/stdout.
+    Responses are collected in a buffer and sent by the server.
+    """
+
+    def __init__(self, go_engine, board, pool, debug_mode = False):
+        GtpConnection.__init__(self, go_engine, board, debug_mode, pipelined = True)
+        self.pool = pool
+        self.closed = False
+        self.seed = None
+        self.searches = 0
+        self.stats = None
+
+    def install_alarm_handler(self):
+        # sessions run in threads, the time limit is handled by the workers
+        pass
+
+    def start_pondering(self):
+        # the searches run in the worker processes, which do not
+        # keep the results of a session between commands
+        pass
+
+    def engine_settings(self):
+        """ Engine options set over GTP that the worker engine needs """
+        return {"playout_policy": self.go_engine.playout_policy,
+                "root_policy": self.go_engine.root_policy,
+                "rave_equivalence": self.go_engine.rave_equivalence,
+                "playout_cutoff": self.go_engine.playout_cutoff,
+                "evaluator": self.go_engine.evaluator,
+                "evaluation_scale": self.go_engine.evaluation_scale}
+
+    def flush(self):
+        # output is sent by the server after each command
+        pass
+
+    def enable_stats(self, enabled):
+        # the module statistics of the server are shared by all sessions
+        if not enabled:
+            self.stats = None
+        elif self.stats is None:
+            self.stats = SearchStats()
+
+    def current_stats(self):
+        return self.stats
+
+    def add_worker_stats(self, stats):
+        """ Add the statistics a worker collected for this session """
+        if stats is not None and self.stats is not None:
+            self.stats.add(stats)
+
+    def seed_cmd(self, args):
+        """
+        seed N: the searches of this session run in the worker processes,
+        which restart their random numbers from N and the number of the
+        search. The random numbers of the server and of the other
+        sessions are not changed.
+        """
+        try:
+            seed = int(args[0])
+            if seed < 0:
+                raise ValueError
+        except ValueError:
+            self.error('Usage: seed INT')
+            return
+        self.seed = seed
+        self.searches = 0
+        self.respond()
+
+    def job_seed(self):
+        """ Seed for the next search sent to a worker, None before seed N """
+        if self.seed is None:
+            return None
+        self.searches += 1
+        return [self.seed, self.searches]
+
+    def quit_cmd(self, args):
+        self.respond()
+        self.closed = True
+
+    def timed_get_move(self, color, timelimit):
+        future = self.pool.submit(worker_get_move, self.board, color,
+                                  timelimit, self.engine_settings(),
+                                  self.stats is not None, self.job_seed())
+        move, stats = future.result()
+        self.add_worker_stats(stats)
+        self.go_engine.best_move = move
+        return move
+
+    def timed_solve(self, timelimit, processes=1):
+        result, stats = self.pool.submit(worker_solve, self.board, timelimit, processes,
+                                         self.stats is not None, self.job_seed()).result()
+        self.add_worker_stats(stats)
+        if result is None:
+            raise TimeoutError
+        return result
+
+class GtpServer(object):
+
+    def __init__(self, workers = None, debug_mode = False):
+        self.pool = ProcessPoolExecutor(max_workers = workers,
+                                        initializer = _init_worker)
+        self.debug_mode = debug_mode
+        self.num_sessions = 0
+
+    def new_session(self):
+        return GtpSession(GomokuSimulationPlayer(), SimpleGoBoard(7),
+                          self.pool, self.debug_mode)
+
+    async def handle_connection(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        session = self.new_session()
+        self.num_sessions += 1
+        try:
+            while not session.closed:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    await loop.run_in_executor(None, session.get_cmd, line.decode())
+                except Exception as e:
+                    session.error(str(e))
+                output = session.take_output()
+                if output:
+                    writer.write(output.encode())
+                    await writer.drain()
+        finally:
+            self.num_sessions -= 1
+            writer.close()
+
+    async def start(self, host = None, port = None, path = None):
+        """
+        Start listening on a unix socket path or on host:port.
+        Returns the asyncio server.
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        self.pool.shutdown(cancel_futures = True)
+
+async def serve(host, port, path, workers):
+    gtp_server = GtpServer(workers)
+    server = await gtp_server.start(host, port, path)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        gtp_server.close()
+
+def run():
+    parser = argparse.ArgumentParser(description = "GTP server for Gomoku4")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 9000)
+    parser.add_argument("--unix", dest = "path", default = None,
+                        help = "listen on a unix socket instead of TCP")
+    parser.add_argument("--workers", type = int, default = None,
+                        help = "search processes, default is the number of CPUs")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.path, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+if __name__=='__main__':
+    run()
@@ -0,0 +1,111 @@
+"""
+move_picker.py
+
+Staged move generation for the alphabeta solver.
+
+MovePicker.moves is a generator that yields the moves of a node in stages:
+    1. the best move stored for the position by an earlier visit
+    2. the forcing move from list_solve_point; when there is one,
+       no other move is generated, as before
+    3. the killer moves of the depth, kept per board size because a
+       picker is used for the positions of every solve command
+    4. the empty points next to a stone, best ScanBoard score first
+    5. all other empty points, shuffled
+Every stage is only computed when the search asks for its first move,
+so a node that cuts off early never pays for the later stages.
+Of the dead points, which are in no window where a five can still be
+made (see SimpleGoBoard.is_live_point), only the first is generated:
+a stone there can never be part of a five, so all of them lead to
+equivalent positions.
+"""
+
+import numpy as np
+from board_util import BLACK, WHITE, EMPTY, where1d
+from scan_scores import score_moves
+import random_source
+
+class MovePicker(object):
+
+    def __init__(self, max_entries=1000000, killers_per_depth=2):
+        """
+        max_entries: the best move table is cleared when it grows larger
+        killers_per_depth: number of killer moves kept for each depth
+        """
+        self.max_entries = max_entries
+        self.killers_per_depth = killers_per_depth
+        self.best_moves = {}
+        self.killers = {}
+
+    @staticmethod
+    def position_key(board):
+        return board.board.tobytes() + bytes([board.current_player])
+
+    def moves(self, board, depth):
+        """
+        Generate the moves of the node at depth, in stage order,
+        without duplicates and with at most one dead point.
+        """
+        tried = set()
+        dead_tried = False
+        for move in self._stages(board, depth, tried):
+            if move in tried:
+                continue
+            tried.add(move)
+            if not board.is_live_point(move):
+                if dead_tried:
+                    continue
+                dead_tried = True
+            yield move
+
+    def _stages(self, board, depth, tried):
+        best = self.best_moves.get(self.position_key(board))
+        if best is not None and board.board[best] == EMPTY:
+            yield best
+
+        solvePoint = board.list_solve_point()
+        if solvePoint:
+            yield solvePoint[0]
+            return
+
+        for move in self.killers.get((board.size, depth), ()):
+            if board.board[move] == EMPTY:
+                yield move
+
+        yield from self.ranked_moves(board)
+
+        rest = [move for move in where1d(board.board == EMPTY).tolist()
+                if move not in tried]
+        random_source.shuffle(rest)
+        yield from rest
+
+    def ranked_moves(self, board):
+        """ Empty points next to a stone, sorted by their ScanBoard score """
+        b = board.board
+        NS = board.NS
+        stones = where1d((b == BLACK) | (b == WHITE))
+        if len(stones) == 0:
+            return []
+        offsets = np.array([1, -1, NS, -NS, NS + 1, -NS - 1, NS - 1, -NS + 1])
+        near = np.unique((stones.reshape(-1, 1) + offsets).ravel())
+        near = near[(near >= 0) & (near < len(b))]
+        near = near[b[near] == EMPTY]
+        if len(near) == 0:
+            return []
+        attack, defend = score_moves(board, near)
+        order = np.argsort(-(attack + defend), kind='stable')
+        return near[order].tolist()
+
+    def cutoff(self, board, move, depth):
+        """ move caused a beta cutoff at depth """
+        self.store(board, move)
+        killers = self.killers.setdefault((board.size, depth), [])
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.killers_per_depth:]
+
+    def store(self, board, move):
+        """ Remember move as the best move of the position """
+        if len(self.best_moves) >= self.max_entries:
+            self.best_moves.clear()
+        self.best_moves[self.position_key(board)] = move
@@ -0,0 +1,116 @@
+"""
+pattern_table.py
+
+Line patterns of get_pattern_moves and list_solve_point, compiled
+to lookup tables.
+
+A pattern is a line of cells written with
+    x  stone of the player to move
+    o  opponent stone
+    .  empty point
+    B  border
+mapped to the offsets of its moves, counted back from the last cell
+of the line (0 is the last cell). Patterns are grouped in categories;
+a line that matches gives its moves to the first category containing it,
+and the moves of the first non-empty category are returned.
+New patterns are added by extending the category dictionaries below.
+
+PatternTable encodes every pattern as a base-4 number with
+. x o B = 0 1 2 3, the first cell being the most significant digit, and
+stores it in a table of 4^length entries. BLACK, WHITE and BORDER are
+1, 2 and 3, so the code of a line comes directly from the board values
+(with BLACK and WHITE swapped when white is to move), and all lines of
+a board are encoded with a few array operations per direction.
+"""
+
+import numpy as np
+from board_util import BLACK, BORDER
+
+PLAYOUT_PATTERNS = [
+    {'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}}, #win
+    {'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}}, #block win
+    {'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}}, #make-four
+    {'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{0,2,5},'.o.oo.':{0,3,5}, 'B.ooo..':{0}, '..ooo.B':{6},
+     'x.ooo..':{0}, '..ooo.x':{6} #block-open-four
+     }]
+
+SOLVER_PATTERNS = [
+    {'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}}, #win
+    {'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}}, #block win
+    {'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}}, #make-four
+    {'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{2},'.o.oo.':{3}}] #block-open-four
+
+CELL_CODES = {'.': 0, 'x': 1, 'o': 2, 'B': 3}
+
+# board value -> cell code when white is to move
+WHITE_TO_MOVE = np.array([0, 2, 1, 3], dtype = np.int32)
+
+def encode(line):
+    code = 0
+    for cell in line:
+        code = 4 * code + CELL_CODES[cell]
+    return code
+
+class PatternTable(object):
+
+    def __init__(self, categories):
+        """
+        Compile a list of pattern categories {line: set of offsets}.
+        """
+        self.lengths = sorted({len(line) for patterns in categories for line in patterns})
+        self.tables = {length: np.zeros(4 ** length, dtype = np.int32)
+                       for length in self.lengths}
+        # entry 0 means no pattern, entry i > 0 is (category, moves as
+        # indices into the line, in the iteration order of the offsets)
+        self.entries = [None]
+        for category, patterns in enumerate(categories):
+            for line, offsets in patterns.items():
+                table = self.tables[len(line)]
+                code = encode(line)
+                if table[code]:
+                    # an earlier category has the same line
+                    continue
+                table[code] = len(self.entries)
+                self.entries.append((category,
+                                     tuple(len(line) - 1 - dis for dis in offsets)))
+
+    def find_moves(self, board, NS, color, border_starts = True):
+        """
+        Match all lines of the board in the four directions.
+        Returns (category, list of moves) for the first category with
+        a match, or None. Lines starting on the border are skipped
+        unless border_starts is True.
+        """
+        cells = board if color == BLACK else WHITE_TO_MOVE[board]
+        size = len(cells)
+        max_length = self.lengths[-1]
+        matches = []
+        for direction, step in enumerate((1, NS, NS + 1, NS - 1)):
+            code = cells
+            for length in range(2, max_length + 1):
+                count = size - (length - 1) * step
+                if count <= 0:
+                    break
+                code = 4 * code[:count] + cells[(length - 1) * step:(length - 1) * step + count]
+                table = self.tables.get(length)
+                if table is None:
+                    continue
+                ids = table[code]
+                for start in np.flatnonzero(ids):
+                    if border_starts or cells[start] != BORDER:
+                        matches.append((int(start), direction, length, step, ids[start]))
+        if not matches:
+            return None
+        best = min(self.entries[match[4]][0] for match in matches)
+        # same order as walking the lines point by point
+        matches.sort()
+        moves = set()
+        for start, _, _, step, entry in matches:
+            category, indices = self.entries[entry]
+            if category == best:
+                for index in indices:
+                    moves.add(start + index * step)
+        return best, list(moves)
+
+PLAYOUT_TABLE = PatternTable(PLAYOUT_PATTERNS)
+SOLVER_TABLE = PatternTable(SOLVER_PATTERNS)
@@ -0,0 +1,53 @@
+"""
+policy_cache.py
+
+Bounded LRU cache of the rule-based playout policy.
+
+Playouts from the same root pass through the same positions near the
+root again and again. PolicyCache keeps the result of
+board.get_pattern_moves for the most recently used positions, keyed by
+the stones and the player to move, so that repeating a position costs a
+dictionary lookup instead of a pattern scan. hits and misses count the
+lookups since the last clear.
+"""
+
+from collections import OrderedDict
+
+class PolicyCache(object):
+
+    def __init__(self, capacity=20000):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(board):
+        return board.board.tobytes(), board.current_player
+
+    def pattern_moves(self, board):
+        """
+        board.get_pattern_moves(), from the cache if possible.
+        The moves are shared with the cache and must not be modified.
+        """
+        key = self.key(board)
+        entries = self.entries
+        if key in entries:
+            self.hits += 1
+            entries.move_to_end(key)
+            return entries[key]
+        self.misses += 1
+        result = board.get_pattern_moves()
+        entries[key] = result
+        if len(entries) > self.capacity:
+            entries.popitem(last = False)
+        return result
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
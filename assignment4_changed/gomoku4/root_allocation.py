@@ -0,0 +1,106 @@
+"""
+root_allocation.py
+
+How the playouts of a flat Monte Carlo search are spread over the root moves.
+
+A strategy works on numpy arrays with the total reward (wins) and the
+number of playouts (visits) of each root move, which may already hold
+earlier statistics. simulate(i) runs one playout after move i and returns
+its result in [-1, 1]. The search stops at deadline (a time.time() value)
+and returns the index of the recommended move; report(i) is called
+whenever the recommendation changes, so that an engine interrupted by
+its time limit still has its current best move. Moves are compared by
+value(wins, visits), the mean result unless a blend with other
+statistics such as amaf.AmafStats.blend is given.
+
+    round_robin          one playout per move in turn
+    sequential_halving   rounds of equal time, after each round the
+                         worse half of the moves is dropped
+    ucb1                 always the move with the best upper confidence bound
+
+Without a deadline, round_robin and ucb1 run until interrupted and
+sequential_halving spreads budget playouts (default 100 per move)
+evenly over its rounds.
+"""
+
+import math
+import time
+import numpy as np
+
+def _mean(wins, visits):
+    return np.where(visits > 0, wins / np.maximum(visits, 1), -np.inf)
+
+def _play(simulate, wins, visits, i):
+    wins[i] += simulate(i)
+    visits[i] += 1
+
+def _time_left(deadline):
+    return deadline is None or time.time() < deadline
+
+def round_robin(simulate, wins, visits, deadline, report, value=_mean):
+    best = int(np.argmax(value(wins, visits)))
+    report(best)
+    while _time_left(deadline):
+        for i in range(len(wins)):
+            _play(simulate, wins, visits, i)
+            new_best = int(np.argmax(value(wins, visits)))
+            if new_best != best:
+                best = new_best
+                report(best)
+    return best
+
+def sequential_halving(simulate, wins, visits, deadline, report, value=_mean, budget=None):
+    arms = list(range(len(wins)))
+    if budget is None:
+        budget = 100 * len(arms)
+    report(int(np.argmax(value(wins, visits))))
+    while len(arms) > 1:
+        rounds_left = math.ceil(math.log2(len(arms)))
+        if deadline is not None:
+            round_end = time.time() + max(deadline - time.time(), 0) / rounds_left
+        else:
+            sweeps = max(budget // rounds_left // len(arms), 1)
+        played = 0
+        while True:
+            for i in arms:
+                _play(simulate, wins, visits, i)
+            played += 1
+            if deadline is not None:
+                if time.time() >= round_end:
+                    break
+            elif played >= sweeps:
+                break
+        budget -= played * len(arms)
+        mean = value(wins, visits)
+        arms.sort(key=lambda i: mean[i], reverse=True)
+        arms = arms[:math.ceil(len(arms) / 2)]
+        report(arms[0])
+    return arms[0]
+
+def ucb1(simulate, wins, visits, deadline, report, value=_mean, exploration=1.4):
+    for i in np.flatnonzero(visits == 0):
+        _play(simulate, wins, visits, i)
+    best = int(np.argmax(visits))
+    report(best)
+    while _time_left(deadline):
+        bound = value(wins, visits) + exploration * np.sqrt(np.log(visits.sum()) / visits)
+        i = int(np.argmax(bound))
+        _play(simulate, wins, visits, i)
+        if visits[i] > visits[best]:
+            best = i
+            report(best)
+    return best
+
+ALLOCATORS = {
+    "round_robin": round_robin,
+    "sequential_halving": sequential_halving,
+    "ucb1": ucb1
+}
+
+def allocate(strategy, simulate, wins, visits, deadline, report, value=None):
+    """ Run the strategy named strategy, returns the index of the best move """
+    if len(wins) == 1:
+        report(0)
+        return 0
+    return ALLOCATORS[strategy](simulate, wins, visits, deadline, report,
+                                value=value or _mean)
@@ -14,6 +14,35 @@ from board_util import GoBoardUtil, BLACK, WHITE, EMPTY, BORDER, \
                        PASS, is_black_white, coord_to_point, where1d, \
                        MAXSIZE, NULLPOINT
 import alphabeta
+from pattern_table import PLAYOUT_TABLE, SOLVER_TABLE
+from scan_scores import score_moves
+
+_WINDOW_TABLES = {}
+
+def window_tables(size):
+    """
+    The five-point windows of a board of size, the lines where a five
+    can be made, as (windows, masks, all_windows): windows lists the
+    points of each window, bit w of masks[point] is set if window w
+    goes through point, and all_windows has the bits of all windows.
+    Built once for each size and shared by all boards of that size.
+    """
+    tables = _WINDOW_TABLES.get(size)
+    if tables is None:
+        windows = []
+        for row in range(1, size + 1):
+            for col in range(1, size + 1):
+                for drow, dcol in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+                    if 1 <= row + 4 * drow <= size and 1 <= col + 4 * dcol <= size:
+                        windows.append([coord_to_point(row + i * drow, col + i * dcol, size)
+                                        for i in range(5)])
+        masks = [0] * (size * size + 3 * (size + 1))
+        for w, points in enumerate(windows):
+            for point in points:
+                masks[point] |= 1 << w
+        tables = windows, masks, (1 << len(windows)) - 1
+        _WINDOW_TABLES[size] = tables
+    return tables
 
 class SimpleGoBoard(object):
 
@@ -107,6 +136,7 @@ class SimpleGoBoard(object):
         self.liberty_of = np.full(self.maxpoint, NULLPOINT, dtype = np.int32)
         self._initialize_empty_points(self.board)
         self._initialize_neighbors()
+        self._initialize_windows()
 
     def copy(self):
         b = SimpleGoBoard(self.size)
@@ -116,6 +146,8 @@ class SimpleGoBoard(object):
         b.current_player = self.current_player
         assert b.maxpoint == self.maxpoint
         b.board = np.copy(self.board)
+        b.stone_windows = list(self.stone_windows)
+        b.window_history = list(self.window_history)
         return b
 
     def row_start(self, row):
@@ -153,6 +185,33 @@ class SimpleGoBoard(object):
             else:
                 self.neighbors.append(self._on_board_neighbors(point))
         
+    def _initialize_windows(self):
+        """
+        stone_windows[color] has bit w set if window w, see window_tables,
+        holds a stone of color. A window without stones of the opponent
+        is open for color, and no five can be made any more when every
+        window holds stones of both colors. play_move_gomoku updates
+        stone_windows and keeps its old value in window_history for
+        undo_move_gomoku.
+        """
+        self.windows, self.window_masks, self.all_windows = window_tables(self.size)
+        self.stone_windows = [0, 0, 0]
+        self.window_history = []
+
+    def open_window_count(self, color):
+        """ Number of windows where color can still make a five """
+        opponent = GoBoardUtil.opponent(color)
+        return bin(self.all_windows & ~self.stone_windows[opponent]).count("1")
+
+    def is_dead_draw(self):
+        """ No five can be made any more by either color """
+        return (self.stone_windows[BLACK] & self.stone_windows[WHITE]) == self.all_windows
+
+    def is_live_point(self, point):
+        """ point is in a window where one of the colors can still make a five """
+        blocked = self.stone_windows[BLACK] & self.stone_windows[WHITE]
+        return (self.window_masks[point] & ~blocked) != 0
+
     def is_eye(self, point, color):
         """
         Check if point is a simple eye for color
@@ -369,7 +428,22 @@ class SimpleGoBoard(object):
             return False
         self.board[point] = color
         self.current_player = GoBoardUtil.opponent(color)
+        stone_windows = self.stone_windows
+        self.window_history.append(stone_windows[color])
+        stone_windows[color] |= self.window_masks[point]
         return True
+
+    def undo_move_gomoku(self, point):
+        """
+        Take back the stone on point, which must be the last move
+        played by play_move_gomoku that is not taken back yet.
+        The stone is of the opponent of the player to move, who is
+        to move again afterwards.
+        """
+        color = WHITE + BLACK - self.current_player
+        self.board[point] = EMPTY
+        self.current_player = color
+        self.stone_windows[color] = self.window_history.pop()
         
     def _point_direction_check_connect_gomoko(self, point, shift):
         """
@@ -398,8 +472,8 @@ class SimpleGoBoard(object):
                     break
             else:
                 break
-        assert count <= 5
-        return count == 5
+        # a move that joins two lines can make more than five in a row
+        return count >= 5
     
     def point_check_game_end_gomoku(self, point):
         """
@@ -440,8 +514,15 @@ class SimpleGoBoard(object):
 
         return False, None
 
-    def solve(self):
-        result, move, drawMove = alphabeta.solve(self)
+    def solve(self, processes=1, table=None, picker=None):
+        """
+        Solve the position, with several solver processes if processes > 1.
+        table and picker keep what the solver learned, see alphabeta.solve.
+        Returns (winner, move) for a win, ('draw', move) for a draw
+        and (winner, 'NoMove') for a loss.
+        """
+        result, move, drawMove = alphabeta.parallel_solve(self, processes,
+                                                          table=table, picker=picker)
         if move=="First":
             if result==0:
                 return 'draw',drawMove
@@ -459,6 +540,10 @@ class SimpleGoBoard(object):
             return winner, move
 
     def check_pattern(self,point,have,direction_x,direction_y,moveSet,patternList,color,flag):
+        """
+        String matching version of the pattern scan,
+        kept as the reference for pattern_table.
+        """
         for i in range(0,4):
             if have in patternList[i]:
                 for dis in patternList[i][have]:
@@ -487,62 +572,25 @@ class SimpleGoBoard(object):
         1. direct winning point xxxx. x.xxx xx.xx
         2. urgent blocking point xoooo.
         3. wining in 2 step point
+        The patterns are in pattern_table.PLAYOUT_PATTERNS.
+        Returns (pattern category, moves) or None.
         """
-        moveSet=[set(),set(),set(),set()]
-        color=self.current_player
-
-        patternList=[{'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}}, #win
-                     {'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}}, #block win
-                     {'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}}, #make-four
-                     {'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{0,2,5},'.o.oo.':{0,3,5}, 'B.ooo..':{0}, '..ooo.B':{6},
-                     'x.ooo..':{0}, '..ooo.x':{6} #block-open-four
-                     }]
-
-        direction_x=[1,0,1,-1]
-        direction_y=[0,1,1,1]
-        flag=[False]
+        return PLAYOUT_TABLE.find_moves(self.board, self.NS, self.current_player)
 
-        for point in range(0, len(self.board)):
-            if flag[0]:
-                break
-            for direction in range(0,4):
-                    self.check_pattern(point,'',direction_x[direction],direction_y[direction],moveSet,patternList,color,flag)
-        
-        i=0
-        while i<4 and not bool(moveSet[i]): i+=1
-        if i==4:
-            return None
-        else:
-            return i, list(moveSet[i])
-            
     def list_solve_point(self):
         """
         1. direct winning point xxxx. x.xxx xx.xx
         2. urgent blocking point xoooo.
         3. wining in 2 step point
+        The patterns are in pattern_table.SOLVER_PATTERNS.
+        Returns the moves of the first category found or None.
         """
-        moveSet=[set(),set(),set(),set()]
-        color=self.current_player
-
-        patternList=[{'xxxx.':{0},'xxx.x':{1},'xx.xx':{2},'x.xxx':{3},'.xxxx':{4}},{'oooo.':{0},'ooo.o':{1},'oo.oo':{2},'o.ooo':{3},'.oooo':{4}},{'.xxx..':{1},'..xxx.':{4},'.xx.x.':{2},'.x.xx.':{3}},{'.ooo..':{1,5},'..ooo.':{0,4},'.oo.o.':{2},'.o.oo.':{3}}]
-
-        direction_x=[1,0,1,-1]
-        direction_y=[0,1,1,1]
-        flag=[False]
-
-        for point in where1d(self.board!=BORDER):
-            if flag[0]:
-                break
-            for direction in range(0,4):
-                    self.check_pattern(point,'',direction_x[direction],direction_y[direction],moveSet,patternList,color,flag)
-        
-        i=0
-        while i<4 and not bool(moveSet[i]):
-            i+=1
-        if i==4:
+        ret = SOLVER_TABLE.find_moves(self.board, self.NS, self.current_player,
+                                      border_starts = False)
+        if ret is None:
             return None
-        else:
-            return list(moveSet[i])
+        return ret[1]
+
     def check_direction_connect_and_compute_score_attck(self, point, shift):
         color = self.current_player
         count = 1
@@ -753,38 +801,32 @@ class SimpleGoBoard(object):
         -attack
         -defend
         then sort the moves list according to the score
-        """
-        possibleMovesWithScore = []
-        for m in possibleMoves:
-            possibleMovesWithScore.append([m,0])
-        # attack evaluation
-        for index,move in enumerate(possibleMovesWithScore):
-            # move[0]: move position  
-            score = self.evaluate_move_on_attack(move[0])
-            possibleMovesWithScore[index][1] += score
-            if score >= 100000:
-                # check first
-                # if we have 5-connect after the move and about to win 
-                possibleMoves[index] = possibleMoves[0]
-                possibleMoves[0] = move[0]
-                return possibleMoves
+        The scores of all moves are computed at once by scan_scores.score_moves,
+        evaluate_move_on_attack and evaluate_move_on_defend score a single move.
+        """
+        if len(possibleMoves) == 0:
+            return possibleMoves
+        attack, defend = score_moves(self, possibleMoves)
+        winning = where1d(attack >= 100000)
+        if len(winning) > 0:
+            # check first
+            # if we have 5-connect after the move and about to win 
+            index = winning[0]
+            move = possibleMoves[index]
+            possibleMoves[index] = possibleMoves[0]
+            possibleMoves[0] = move
+            return possibleMoves
         # check if opponent win immediately
         # if self.check_if_opponent_has_immediate_win():
         #     # prune this search because this will lead to lose
         #     # print("check")
         #     possibleMoves = []
         #     return possibleMoves
-        
 
-        # defense evaluation
-        for index,move in enumerate(possibleMovesWithScore):
-        #     # move[0]: move position
-            score = self.evaluate_move_on_defend(move[0])
-            possibleMovesWithScore[index][1] += score
-        
-        # sort the possible move list according to the score
-        possibleMovesWithScore.sort(key=lambda x:x[1], reverse=True)
-        for index,move in enumerate(possibleMovesWithScore):
-            possibleMoves[index] = move[0]
-            # self.board[move[0]] = int(move[1])
+        # sort the possible move list according to the score,
+        # moves with equal scores keep their order
+        order = np.argsort(-(attack + defend), kind = 'stable')
+        sortedMoves = [possibleMoves[index] for index in order]
+        for index, move in enumerate(sortedMoves):
+            possibleMoves[index] = move
         return possibleMoves
@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+import numpy as np
+from amaf import AmafStats
+
+class AmafStatsTestCase(unittest.TestCase):
+    """Tests for amaf.py"""
+
+    def test_update(self):
+        amaf = AmafStats(10, 100)
+        amaf.update([2, 5], 1.0)
+        amaf.update([5], -1.0)
+        self.assertEqual(list(amaf.visits[[2, 5, 7]]), [1, 2, 0])
+        self.assertEqual(list(amaf.wins[[2, 5, 7]]), [1.0, 0.0, 0.0])
+
+    def test_blend(self):
+        amaf = AmafStats(10, 100)
+        for _ in range(10):
+            amaf.update([2], 1.0)
+        points = np.array([2, 3, 4])
+        wins = np.array([-1.0, -1.0, 0.0])
+        visits = np.array([1.0, 1.0, 0.0])
+        value = amaf.blend(points, wins, visits)
+        # few direct playouts: the AMAF value dominates
+        self.assertGreater(value[0], 0.5)
+        # no AMAF statistics: the direct value
+        self.assertEqual(value[1], -1.0)
+        self.assertEqual(value[2], -np.inf)
+        # many direct playouts: the direct value dominates
+        value = amaf.blend(points, np.array([-1000.0, 0, 0]), np.array([1000.0, 0, 0]))
+        self.assertLess(value[0], -0.5)
+
+if __name__ == '__main__':
+    unittest.main()
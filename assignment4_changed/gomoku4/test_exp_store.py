@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+from exp_store import ExperienceStore, position_key
+from simple_board import SimpleGoBoard
+from Gomoku4 import GomokuSimulationPlayer
+
+class ExperienceStoreTestCase(unittest.TestCase):
+    """Tests for exp_store.py"""
+
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "exp.db")
+
+    def test_round_trip(self):
+        store = ExperienceStore(self.path)
+        store.record(7, {10: 2.0, 11: -1.0}, {10: 3, 11: 2})
+        self.assertEqual(store.lookup(7), ({10: 2.0, 11: -1.0}, {10: 3, 11: 2}))
+        store.close()
+        store = ExperienceStore(self.path)
+        self.assertEqual(store.lookup(7), ({10: 2.0, 11: -1.0}, {10: 3, 11: 2}))
+        self.assertEqual(store.lookup(8), ({}, {}))
+        store.close()
+
+    def test_eviction(self):
+        store = ExperienceStore(self.path, capacity = 3)
+        for key in range(5):
+            store.record(key, {1: 1.0}, {1: key + 1})
+            store.flush()
+        self.assertEqual(store.evicted, 2)
+        self.assertEqual(store.lookup(0), ({}, {}))
+        self.assertEqual(store.lookup(4), ({1: 1.0}, {1: 5}))
+        store.close()
+
+    def test_lookup_keeps_position(self):
+        store = ExperienceStore(self.path, capacity = 3)
+        for key in range(3):
+            store.record(key, {1: 1.0}, {1: 1})
+            store.flush()
+        store.close()
+        store = ExperienceStore(self.path, capacity = 3)
+        self.assertEqual(store.lookup(0), ({1: 1.0}, {1: 1}))
+        store.flush()
+        store.record(3, {1: 1.0}, {1: 1})
+        store.flush()
+        self.assertEqual(store.evicted, 1)
+        self.assertEqual(store.lookup(1), ({}, {}))
+        self.assertEqual(store.lookup(0), ({1: 1.0}, {1: 1}))
+        store.close()
+
+    def test_engine_path(self):
+        engine = GomokuSimulationPlayer(exp_path = self.path)
+        self.assertEqual(engine.exp.path, self.path)
+        with mock.patch.dict(os.environ, {"GOMOKU_EXP_DB": self.path}):
+            self.assertEqual(GomokuSimulationPlayer().exp.path, self.path)
+
+    def test_position_key(self):
+        board = SimpleGoBoard(7)
+        empty = position_key(board)
+        board.play_move_gomoku(board.pt(4, 4), board.current_player)
+        self.assertNotEqual(position_key(board), empty)
+        board.reset(7)
+        self.assertEqual(position_key(board), empty)
+
+if __name__ == '__main__':
+    unittest.main()
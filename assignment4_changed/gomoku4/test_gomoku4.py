@@ -0,0 +1,279 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import io
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import alphabeta
+import evaluation
+import random_source
+import search_stats
+from board_util import GoBoardUtil, BLACK, WHITE
+from exp_store import position_key
+from Gomoku4 import GomokuSimulationPlayer, play_move, make_connection
+from gtp_connection import GtpConnection
+import gtp_regress
+from gtp_regress import RegressionConnection
+from move_picker import MovePicker
+from simple_board import SimpleGoBoard
+
+def new_engine():
+    """ An engine with an empty experience store of its own """
+    return GomokuSimulationPlayer(exp_path = os.path.join(tempfile.mkdtemp(), "exp.db"))
+
+class SolverControllerTestCase(unittest.TestCase):
+    """Tests for the exact solver inside GomokuSimulationPlayer.get_move"""
+
+    def test_budget(self):
+        engine = new_engine()
+        engine.timelimit = 10
+        self.assertEqual(engine.solver_budget(SimpleGoBoard(7)), 0)
+        board = SimpleGoBoard(3)
+        self.assertEqual(engine.solver_budget(board), 10 * engine.solver_share)
+
+    def test_solve_move(self):
+        engine = new_engine()
+        board = SimpleGoBoard(5)
+        for col in range(1, 5):
+            board.play_move_gomoku(board.pt(1, col), board.current_player)
+            board.play_move_gomoku(board.pt(3, col), board.current_player)
+        self.assertEqual(engine.solve_move(board, 5), board.pt(1, 5))
+        # the solver works on a copy
+        self.assertEqual(len(board.get_empty_points()), 17)
+
+    def test_solve_after_boardsize(self):
+        con = RegressionConnection(new_engine(), SimpleGoBoard(7))
+        for command in ["play b a5", "play w d5", "play b a4", "play w d4", "play b a3",
+                        "play w d3", "play b g5", "play w a7", "play b g4", "play w g7",
+                        "play b g3", "solve", "boardsize 5", "play b a5", "play w b5",
+                        "play b c4", "play w d4", "play b e3", "play w a3", "play b b2",
+                        "play w c2", "play b d1", "play w c3", "solve"]:
+            con.get_cmd(command + "\n")
+        output = con.take_output()
+        self.assertNotIn("?", output)
+        self.assertRegex(output, "= w D[26]")
+
+class PonderTestCase(unittest.TestCase):
+    """Tests for GomokuSimulationPlayer.ponder"""
+
+    def test_ponder_not_in_search_stats(self):
+        con = GtpConnection(new_engine(), SimpleGoBoard(7), pipelined = True)
+        con.pondering = True
+        for row, col in [(1, 1), (7, 7), (1, 7), (7, 1), (4, 4), (3, 5), (5, 2), (2, 3),
+                         (6, 5), (2, 6), (5, 6), (6, 3), (3, 2), (4, 7), (7, 4)]:
+            con.board.play_move_gomoku(con.board.pt(row, col), con.board.current_player)
+        stats = search_stats.enable()
+        self.addCleanup(search_stats.disable)
+        con.get_cmd("timelimit 1\n")
+        con.get_cmd("genmove w\n")
+        playouts = stats.playouts
+        self.assertGreater(playouts, 0)
+        time.sleep(0.3)
+        self.assertTrue(con._ponder_thread.is_alive())
+        con.get_cmd("search_stats\n")
+        self.assertEqual(stats.playouts, playouts)
+        self.assertGreater(sum(sum(visits.values()) for _, visits
+                               in con.go_engine.ponder_results.values()), 0)
+
+    def test_ponder_likely_replies(self):
+        engine = new_engine()
+        board = SimpleGoBoard(7)
+        for row, col in [(1, 1), (7, 7), (1, 7), (7, 1), (4, 4), (3, 5), (5, 2), (2, 3),
+                         (6, 5), (2, 6), (5, 6), (6, 3), (3, 2), (4, 7), (7, 4)]:
+            board.play_move_gomoku(board.pt(row, col), board.current_player)
+        stop = threading.Event()
+        thread = threading.Thread(target = engine.ponder, args = (board.copy(), stop))
+        thread.start()
+        time.sleep(0.5)
+        start = time.time()
+        stop.set()
+        thread.join()
+        self.assertLess(time.time() - start, 0.5)
+        reply = engine.likely_replies(board)[0]
+        play_move(board, reply, board.current_player)
+        wins, visits = engine.ponder_results[position_key(board)]
+        self.assertGreater(sum(visits.values()), 0)
+
+class TruncatedPlayoutTestCase(unittest.TestCase):
+    """Tests for playouts with a playout_cutoff"""
+
+    def test_threats_evaluation(self):
+        board = SimpleGoBoard(7)
+        for col in range(2, 5):
+            board.play_move_gomoku(board.pt(4, col), board.current_player)
+            board.play_move_gomoku(board.pt(1, 2 * col - 3), board.current_player)
+        # black to move with an open three
+        self.assertGreater(evaluation.threats(board), 0.5)
+        board.current_player = GoBoardUtil.opponent(board.current_player)
+        self.assertLess(evaluation.threats(board), -0.5)
+
+    def test_cutoff(self):
+        engine = new_engine()
+        engine.playout_cutoff = 2
+        board = SimpleGoBoard(7)
+        board.play_move_gomoku(board.pt(4, 4), board.current_player)
+        for _ in range(20):
+            played = []
+            result = engine._do_playout(board, board.current_player, played)
+            self.assertGreaterEqual(len(played), 2)
+            self.assertLess(len(played), 46)
+            self.assertTrue(-1 <= result <= 1)
+        self.assertEqual(len(board.get_empty_points()), 48)
+
+class RandomPlayoutTestCase(unittest.TestCase):
+    """Tests for GoBoardUtil.random_playout_gomoku"""
+
+    def test_playout(self):
+        board = SimpleGoBoard(7)
+        board.play_move_gomoku(board.pt(4, 4), board.current_player)
+        before = board.board.copy()
+        for _ in range(50):
+            played = []
+            winner = GoBoardUtil.random_playout_gomoku(board, played)
+            self.assertTrue((board.board == before).all())
+            self.assertEqual(board.current_player, WHITE)
+            self.assertEqual(len(set(played)), len(played))
+            for i, move in enumerate(played):
+                board.play_move_gomoku(move, board.current_player)
+                game_end, five = board.check_game_end_gomoku()
+                self.assertEqual(game_end, i == len(played) - 1 and winner is not None)
+            if winner is not None:
+                self.assertEqual(five, winner)
+            else:
+                self.assertTrue(board.is_dead_draw())
+            for move in played[::-1]:
+                board.undo_move_gomoku(move)
+
+class OpenWindowTestCase(unittest.TestCase):
+    """Tests for the open window counters of SimpleGoBoard"""
+
+    def assertCounters(self, board):
+        for color in (BLACK, WHITE):
+            stone_windows = sum(1 << w for w, points in enumerate(board.windows)
+                                if any(board.board[point] == color for point in points))
+            self.assertEqual(board.stone_windows[color], stone_windows)
+            opponent = GoBoardUtil.opponent(color)
+            open_windows = sum(all(board.board[point] != opponent for point in points)
+                               for points in board.windows)
+            self.assertEqual(board.open_window_count(color), open_windows)
+
+    def test_play_undo(self):
+        random_source.seed(3)
+        board = SimpleGoBoard(7)
+        moves = board.get_empty_points()
+        random_source.shuffle(moves)
+        for move in moves[:30].tolist():
+            board.play_move_gomoku(move, board.current_player)
+            self.assertCounters(board)
+        copy = board.copy()
+        self.assertCounters(copy)
+        for move in moves[:30].tolist()[::-1]:
+            board.undo_move_gomoku(move)
+            self.assertCounters(board)
+        self.assertEqual(board.current_player, BLACK)
+        self.assertEqual(board.open_window_count(BLACK), 60)
+        self.assertCounters(copy)
+        for move in moves[:30].tolist()[::-1]:
+            copy.undo_move_gomoku(move)
+        self.assertEqual(copy.stone_windows, [0, 0, 0])
+
+    def test_shared_tables(self):
+        board = SimpleGoBoard(7)
+        self.assertIs(board.copy().window_masks, board.window_masks)
+        board.reset(5)
+        self.assertEqual(len(board.windows), 12)
+
+    def play(self, board, black, white):
+        for row, col in black:
+            board.play_move_gomoku(board.pt(row, col), BLACK)
+        for row, col in white:
+            board.play_move_gomoku(board.pt(row, col), WHITE)
+
+    def test_dead_draw(self):
+        self.assertTrue(SimpleGoBoard(4).is_dead_draw())
+        board = SimpleGoBoard(5)
+        self.assertFalse(board.is_dead_draw())
+        # one stone of each color in every row, column and diagonal
+        self.play(board, [(1, 1), (2, 3), (3, 5), (4, 2), (5, 4)],
+                         [(1, 2), (2, 4), (3, 1), (4, 3), (5, 5)])
+        self.assertCounters(board)
+        self.assertTrue(board.is_dead_draw())
+        self.assertFalse(any(board.is_live_point(move) for move in board.get_empty_points()))
+        self.assertEqual(alphabeta.game_end(board), 0)
+        # every move draws, solve still gives one
+        result, move, draw_move = alphabeta.solve(board)
+        self.assertEqual((result, move), (True, "NoMove"))
+        self.assertIn(draw_move, board.get_empty_points().tolist())
+
+    def test_one_dead_point(self):
+        board = SimpleGoBoard(6)
+        self.play(board, [(1, 1), (2, 3), (3, 5), (4, 2), (5, 4), (2, 6), (6, 2), (6, 5)],
+                         [(1, 2), (2, 4), (3, 1), (4, 3), (5, 5), (4, 6), (6, 4), (6, 6)])
+        self.assertFalse(board.is_dead_draw())
+        dead = [move for move in board.get_empty_points() if not board.is_live_point(move)]
+        self.assertEqual(len(dead), 3)
+        moves = list(MovePicker().moves(board, 0))
+        self.assertEqual(len(moves), len(set(moves)))
+        self.assertEqual(len([move for move in moves if move in dead]), 1)
+        self.assertEqual(len(moves), len(board.get_empty_points()) - 2)
+
+class SetupTestCase(unittest.TestCase):
+    """Tests for the setup and loadpos GTP commands"""
+
+    def run_command(self, con, command):
+        con.get_cmd(command + "\n")
+        return con.take_output().strip()
+
+    def test_setup(self):
+        con = RegressionConnection(new_engine(), SimpleGoBoard(7))
+        self.assertEqual(self.run_command(con, "setup b D4 w"),
+                         "? Usage: setup [b|w] MOVE [[b|w] MOVE ...]")
+        self.assertEqual(self.run_command(con, "setup A1 G7 A2 G6 A3 G5 A4 G4 A5 G3"),
+                         '? illegal move: "G3" game is over')
+        self.assertEqual(len(con.board.get_empty_points()), 49)
+        self.assertEqual(self.run_command(con, "setup b D4 w C3 E5"), "=")
+        self.assertEqual(con.board.current_player, WHITE)
+
+    def test_loadpos(self):
+        con = RegressionConnection(new_engine(), SimpleGoBoard(7))
+        self.assertEqual(self.run_command(con, "loadpos x../.o./..."), "=")
+        self.assertEqual(con.board.size, 3)
+        self.assertEqual(con.board.current_player, BLACK)
+        self.assertEqual(self.run_command(con, "loadpos x../.z./..."),
+                         '? loadpos: unknown point "z"')
+
+class PipelinedConnectionTestCase(unittest.TestCase):
+    """Tests for GtpConnection.start_pipelined_connection"""
+
+    def test_character_split_between_chunks(self):
+        read_fd, write_fd = os.pipe()
+        os.write(write_fd, '# \u00e9\u00e9\nboardsize 5\nshowboard\n'.encode('utf-8'))
+        os.close(write_fd)
+        output = io.StringIO()
+        con = make_connection(pipelined = True)
+        with os.fdopen(read_fd, 'rb') as stdin, \
+             mock.patch('gtp_connection.stdin', stdin), \
+             mock.patch('gtp_connection.stdout', output):
+            con.start_pipelined_connection(chunk_size = 3)
+        self.assertEqual(con.board.size, 5)
+        self.assertNotIn('?', output.getvalue())
+
+class BaselineKeyTestCase(unittest.TestCase):
+    """Tests for gtp_regress.baseline_key"""
+
+    def test_independent_of_cwd(self):
+        path = os.path.join(gtp_regress.HERE, "..", "..", "assignment2", "test1.gtp")
+        keys = []
+        for cwd in (gtp_regress.HERE, tempfile.gettempdir()):
+            with mock.patch('os.getcwd', return_value = cwd):
+                keys.append(gtp_regress.baseline_key(os.path.relpath(path, cwd)))
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(keys[0], os.path.join("..", "..", "assignment2", "test1.gtp"))
+
+if __name__ == '__main__':
+    unittest.main()
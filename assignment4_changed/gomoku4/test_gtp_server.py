@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import Future
+import gtp_server
+import random_source
+import search_stats
+from random_source import RandomSource
+from search_stats import SearchStats
+from board_util import WHITE
+from gtp_server import GtpServer, GtpSession, _start_job
+from Gomoku4 import GomokuSimulationPlayer
+from simple_board import SimpleGoBoard
+
+async def send(reader, writer, command):
+    writer.write((command + '\n').encode())
+    await writer.drain()
+    return (await reader.readuntil(b'\n\n')).decode().strip()
+
+class RecordingPool(object):
+    """ Records the jobs submitted by a session instead of running them """
+
+    def __init__(self, stats = None):
+        self.jobs = []
+        self.stats = stats
+
+    def submit(self, function, *args):
+        self.jobs.append(args)
+        future = Future()
+        future.set_result((None, self.stats))
+        return future
+
+class GtpServerTestCase(unittest.TestCase):
+    """Tests for gtp_server.py"""
+
+    def run_with_server(self, client):
+        # the workers are forked inside the patch and keep the variable
+        environ = {"GOMOKU_EXP_DB": os.path.join(tempfile.mkdtemp(), "exp.db")}
+        async def main():
+            gtp_server = GtpServer(workers = 2)
+            path = os.path.join(tempfile.mkdtemp(), "gtp.sock")
+            server = await gtp_server.start(path = path)
+            try:
+                async with server:
+                    return await client(path)
+            finally:
+                gtp_server.close()
+        with mock.patch.dict(os.environ, environ):
+            return asyncio.run(main())
+
+    def test_sessions_have_own_board(self):
+        async def client(path):
+            r1, w1 = await asyncio.open_unix_connection(path)
+            r2, w2 = await asyncio.open_unix_connection(path)
+            self.assertEqual(await send(r1, w1, "name"), "= Gomoku4")
+            self.assertEqual(await send(r1, w1, "play b d4"), "=")
+            self.assertEqual(await send(r1, w1, "gogui-rules_side_to_move"), "= white")
+            self.assertEqual(await send(r2, w2, "gogui-rules_side_to_move"), "= black")
+            self.assertEqual(await send(r2, w2, "foo"), "? Unknown command")
+            self.assertEqual(await send(r1, w1, "quit"), "=")
+            self.assertEqual(await r1.read(), b'')
+            w2.close()
+        self.run_with_server(client)
+
+    def test_concurrent_genmove(self):
+        async def client(path):
+            conns = [await asyncio.open_unix_connection(path) for _ in range(2)]
+            for reader, writer in conns:
+                await send(reader, writer, "timelimit 2")
+                await send(reader, writer, "play b d4")
+            replies = await asyncio.gather(*[send(reader, writer, "genmove w")
+                                             for reader, writer in conns])
+            for (reader, writer), reply in zip(conns, replies):
+                self.assertRegex(reply, "^= [A-G][1-7]$")
+                board = await send(reader, writer, "gogui-rules_board")
+                self.assertEqual(board.count("O"), 1)
+                writer.close()
+        self.run_with_server(client)
+
+    def test_seed_sent_to_workers(self):
+        seeds = []
+        for _ in range(2):
+            pool = RecordingPool()
+            engine = GomokuSimulationPlayer(exp_path = os.path.join(tempfile.mkdtemp(), "exp.db"))
+            session = GtpSession(engine, SimpleGoBoard(7), pool)
+            session.timed_get_move(WHITE, 1)
+            random_source.seed(7)
+            session.get_cmd("seed 5\n")
+            # the random numbers of the server are not changed
+            self.assertEqual(random_source.uniform(), RandomSource(7).uniform())
+            session.timed_get_move(WHITE, 1)
+            session.timed_get_move(WHITE, 1)
+            self.assertEqual(session.take_output(), "= \n\n")
+            seeds.append([job[-1] for job in pool.jobs])
+        self.assertEqual(seeds[0], [None, [5, 1], [5, 2]])
+        self.assertEqual(seeds[1], seeds[0])
+
+    def test_start_job(self):
+        engine = GomokuSimulationPlayer(exp_path = os.path.join(tempfile.mkdtemp(), "exp.db"))
+        engine.solver_table.put(1, 0, 0)
+        picker = engine.solver_picker
+        values = []
+        with mock.patch.object(gtp_server, "_worker_engine", engine):
+            for _ in range(2):
+                _start_job([5, 1])
+                values.append([random_source.uniform() for _ in range(3)])
+        self.assertEqual(values[0], values[1])
+        self.assertEqual(len(engine.solver_table), 0)
+        self.assertIsNot(engine.solver_picker, picker)
+
+    def test_start_job_stats(self):
+        engine = GomokuSimulationPlayer(exp_path = os.path.join(tempfile.mkdtemp(), "exp.db"))
+        self.addCleanup(search_stats.disable)
+        with mock.patch.object(gtp_server, "_worker_engine", engine):
+            stats = _start_job(None, stats = True)
+            self.assertIs(search_stats.current, stats)
+            self.assertIsNone(_start_job(None))
+            self.assertIsNone(search_stats.current)
+
+    def test_stats_per_session(self):
+        worker_stats = SearchStats()
+        worker_stats.node(3)
+        worker_stats.cutoff(0)
+        pool = RecordingPool(worker_stats)
+        sessions = [GtpSession(GomokuSimulationPlayer(
+                        exp_path = os.path.join(tempfile.mkdtemp(), "exp.db")),
+                        SimpleGoBoard(7), pool) for _ in range(2)]
+        sessions[0].get_cmd("search_stats_mode on\n")
+        for session in sessions:
+            session.get_cmd("genmove w\n")
+        # only the first session asks the workers for statistics
+        self.assertEqual([job[-2] for job in pool.jobs], [True, False])
+        self.assertIsNone(search_stats.current)
+        sessions[0].take_output()
+        sessions[0].get_cmd("search_stats\n")
+        self.assertRegex(sessions[0].take_output(), "nodes 1\nnps \\d+\nmax_depth 3")
+        sessions[1].take_output()
+        sessions[1].get_cmd("search_stats\n")
+        self.assertEqual(sessions[1].take_output(), "= disabled\n\n")
+
+"""Main"""
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+from move_picker import MovePicker
+from simple_board import SimpleGoBoard
+
+class MovePickerTestCase(unittest.TestCase):
+    """Tests for move_picker.py"""
+
+    def test_all_moves_once(self):
+        board = SimpleGoBoard(7)
+        board.play_move_gomoku(board.pt(4, 4), board.current_player)
+        board.play_move_gomoku(board.pt(4, 5), board.current_player)
+        picker = MovePicker()
+        moves = list(picker.moves(board, 1))
+        self.assertEqual(sorted(moves), sorted(board.get_empty_points().tolist()))
+        # points next to the stones come before the others
+        ranked = picker.ranked_moves(board)
+        self.assertEqual(moves[:len(ranked)], ranked)
+
+    def test_stage_order(self):
+        board = SimpleGoBoard(7)
+        board.play_move_gomoku(board.pt(4, 4), board.current_player)
+        picker = MovePicker()
+        picker.store(board, board.pt(1, 1))
+        picker.cutoff(SimpleGoBoard(7), board.pt(7, 7), 3)
+        moves = picker.moves(board, 3)
+        self.assertEqual(next(moves), board.pt(1, 1))
+        self.assertEqual(next(moves), board.pt(7, 7))
+
+    def test_forcing_move_only(self):
+        board = SimpleGoBoard(7)
+        for col in range(1, 5):
+            board.play_move_gomoku(board.pt(1, col), board.current_player)
+            board.play_move_gomoku(board.pt(3, col), board.current_player)
+        picker = MovePicker()
+        self.assertEqual(list(picker.moves(board, 1)), [board.pt(1, 5)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import random
+import unittest
+from board_util import BORDER, WHITE, where1d
+from pattern_table import PLAYOUT_PATTERNS, SOLVER_PATTERNS, PLAYOUT_TABLE, SOLVER_TABLE
+from simple_board import SimpleGoBoard
+
+def reference_moves(board, patternList, points):
+    """ The pattern scan with SimpleGoBoard.check_pattern """
+    moveSet = [set() for _ in patternList]
+    for point in points:
+        for direction_x, direction_y in [(1, 0), (0, 1), (1, 1), (-1, 1)]:
+            board.check_pattern(point, '', direction_x, direction_y, moveSet,
+                                patternList, board.current_player, [False])
+    for i, moves in enumerate(moveSet):
+        if moves:
+            return i, [int(move) for move in moves]
+    return None
+
+def random_board(rng, size):
+    board = SimpleGoBoard(size)
+    for _ in range(rng.randint(0, size * size // 2)):
+        empty = board.get_empty_points()
+        board.play_move_gomoku(rng.choice(list(empty)), board.current_player)
+        if board.check_game_end_gomoku()[0]:
+            break
+    return board
+
+class PatternTableTestCase(unittest.TestCase):
+    """Tests for pattern_table.py"""
+
+    def test_same_moves_as_check_pattern(self):
+        rng = random.Random(37)
+        for size in (5, 7, 9):
+            for _ in range(150):
+                board = random_board(rng, size)
+                self.assertEqual(board.get_pattern_moves(),
+                                 reference_moves(board, PLAYOUT_PATTERNS,
+                                                 range(len(board.board))))
+                expected = reference_moves(board, SOLVER_PATTERNS,
+                                           where1d(board.board != BORDER))
+                self.assertEqual(board.list_solve_point(),
+                                 None if expected is None else expected[1])
+
+    def test_win_and_block(self):
+        board = SimpleGoBoard(7)
+        for col in range(1, 5):
+            board.play_move_gomoku(board.pt(1, col), board.current_player)
+            board.play_move_gomoku(board.pt(3, col), board.current_player)
+        # black to move wins, white has four as well
+        self.assertEqual(PLAYOUT_TABLE.find_moves(board.board, board.NS, board.current_player),
+                         (0, [board.pt(1, 5)]))
+        self.assertEqual(SOLVER_TABLE.find_moves(board.board, board.NS, WHITE),
+                         (0, [board.pt(3, 5)]))
+
+if __name__ == '__main__':
+    unittest.main()
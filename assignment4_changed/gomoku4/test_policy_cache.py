@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import unittest
+from policy_cache import PolicyCache
+from simple_board import SimpleGoBoard
+
+class PolicyCacheTestCase(unittest.TestCase):
+    """Tests for policy_cache.py"""
+
+    def test_same_moves(self):
+        cache = PolicyCache()
+        board = SimpleGoBoard(7)
+        for col in range(1, 5):
+            board.play_move_gomoku(board.pt(2, col), board.current_player)
+            board.play_move_gomoku(board.pt(5, col + 1), board.current_player)
+        expected = board.get_pattern_moves()
+        self.assertEqual(cache.pattern_moves(board), expected)
+        self.assertEqual(cache.pattern_moves(board), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        # same stones, other player to move
+        board.current_player = 3 - board.current_player
+        self.assertEqual(cache.pattern_moves(board), board.get_pattern_moves())
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertEqual(cache.hit_rate(), 1 / 3)
+        cache.clear()
+        self.assertEqual((len(cache.entries), cache.hits, cache.misses), (0, 0, 0))
+
+    def test_capacity(self):
+        cache = PolicyCache(capacity = 2)
+        board = SimpleGoBoard(7)
+        first = cache.key(board)
+        cache.pattern_moves(board)
+        for point in board.get_empty_points()[:2]:
+            board.play_move_gomoku(point, board.current_player)
+            cache.pattern_moves(board)
+        self.assertEqual(len(cache.entries), 2)
+        self.assertNotIn(first, cache.entries)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import random
+import time
+import unittest
+import numpy as np
+import root_allocation
+
+class OutOfPlayouts(Exception):
+    pass
+
+def find_best_arm(strategy, seed, budget = 2000):
+    """
+    Run strategy on 30 arms with win probabilities 0.55, 0.45 (9 arms)
+    and 0.2 (20 arms) for budget playouts. Returns True if arm 0 is chosen.
+    """
+    rng = random.Random(seed)
+    probabilities = [0.55] + [0.45] * 9 + [0.2] * 20
+    played = [0]
+    best = [None]
+
+    def simulate(i):
+        if played[0] >= budget:
+            raise OutOfPlayouts
+        played[0] += 1
+        return 1.0 if rng.random() < probabilities[i] else -1.0
+
+    def report(i):
+        best[0] = i
+
+    wins = np.zeros(len(probabilities))
+    visits = np.zeros(len(probabilities))
+    try:
+        if strategy == "sequential_halving":
+            best[0] = root_allocation.sequential_halving(simulate, wins, visits, None,
+                                                         report, budget = budget)
+        else:
+            best[0] = root_allocation.ALLOCATORS[strategy](simulate, wins, visits,
+                                                           None, report)
+    except OutOfPlayouts:
+        pass
+    return best[0] == 0
+
+class RootAllocationTestCase(unittest.TestCase):
+    """Tests for root_allocation.py"""
+
+    def test_more_reliable_than_round_robin(self):
+        trials = 100
+        found = {strategy: sum(find_best_arm(strategy, seed) for seed in range(trials))
+                 for strategy in root_allocation.ALLOCATORS}
+        self.assertGreater(found["sequential_halving"], found["round_robin"] + 10)
+        self.assertGreater(found["ucb1"], found["round_robin"] + 10)
+
+    def test_deadline(self):
+        for strategy in root_allocation.ALLOCATORS:
+            wins = np.zeros(5)
+            visits = np.zeros(5)
+            start = time.time()
+            best = root_allocation.allocate(strategy, lambda i: 1.0 if i == 3 else -1.0,
+                                            wins, visits, start + 0.2, lambda i: None)
+            self.assertLess(time.time() - start, 0.5)
+            self.assertEqual(best, 3)
+
+if __name__ == '__main__':
+    unittest.main()
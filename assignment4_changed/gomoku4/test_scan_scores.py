@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import random
+import unittest
+from scan_scores import score_moves
+from simple_board import SimpleGoBoard
+
+def reference_scan(board, possibleMoves):
+    """ ScanBoard with one evaluate_move_on_attack/defend call per move """
+    possibleMovesWithScore = [[m, 0] for m in possibleMoves]
+    for index, move in enumerate(possibleMovesWithScore):
+        score = board.evaluate_move_on_attack(move[0])
+        move[1] += score
+        if score >= 100000:
+            possibleMoves[index] = possibleMoves[0]
+            possibleMoves[0] = move[0]
+            return possibleMoves
+    for move in possibleMovesWithScore:
+        move[1] += board.evaluate_move_on_defend(move[0])
+    possibleMovesWithScore.sort(key=lambda x:x[1], reverse=True)
+    for index, move in enumerate(possibleMovesWithScore):
+        possibleMoves[index] = move[0]
+    return possibleMoves
+
+def random_board(rng, size):
+    board = SimpleGoBoard(size)
+    for _ in range(rng.randint(0, size * size - 1)):
+        board.play_move_gomoku(rng.choice(list(board.get_empty_points())),
+                               board.current_player)
+        if board.check_game_end_gomoku()[0]:
+            break
+    return board
+
+class ScanScoresTestCase(unittest.TestCase):
+    """Tests for scan_scores.py"""
+
+    def test_same_scores(self):
+        rng = random.Random(38)
+        for size in (5, 7, 9):
+            for _ in range(100):
+                board = random_board(rng, size)
+                points = board.get_empty_points()
+                attack, defend = score_moves(board, points)
+                self.assertEqual(list(attack),
+                                 [board.evaluate_move_on_attack(p) for p in points])
+                self.assertEqual(list(defend),
+                                 [board.evaluate_move_on_defend(p) for p in points])
+
+    def test_same_order_as_reference(self):
+        rng = random.Random(380)
+        for _ in range(200):
+            board = random_board(rng, 7)
+            expected = reference_scan(board, list(board.get_empty_points()))
+            self.assertEqual(list(board.ScanBoard(board.get_empty_points())), expected)
+
+if __name__ == '__main__':
+    unittest.main()
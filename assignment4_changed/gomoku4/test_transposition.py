@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+#/usr/local/bin/python3
+# Set the path to your python3 above
+
+import os
+import pickle
+import tempfile
+import time
+import unittest
+import alphabeta
+from move_picker import MovePicker
+from simple_board import SimpleGoBoard
+from transposition import TranspositionTable, SharedTranspositionTable, EXACT, LOWER, UPPER
+
+class TranspositionTableTestCase(unittest.TestCase):
+    """Tests for transposition.py and the solvers that use it"""
+
+    def test_shared_table(self):
+        table = SharedTranspositionTable(size = 64)
+        try:
+            self.assertIsNone(table.get(5))
+            table.put(5, -1, UPPER)
+            table.put(-7, 1, LOWER)
+            self.assertEqual(table.get(5), (-1, UPPER))
+            self.assertEqual(table.get(-7), (1, LOWER))
+            # same slot, other key
+            self.assertIsNone(table.get(5 + 64))
+            table.put(5 + 64, 0, EXACT)
+            self.assertIsNone(table.get(5))
+            attached = pickle.loads(pickle.dumps(table))
+            self.assertEqual(attached.get(5 + 64), (0, EXACT))
+            attached.close()
+        finally:
+            table.close()
+
+    def test_solve_with_table(self):
+        board = SimpleGoBoard(5)
+        for col in range(1, 5):
+            board.play_move_gomoku(board.pt(1, col), board.current_player)
+            board.play_move_gomoku(board.pt(3, col), board.current_player)
+        table = TranspositionTable()
+        self.assertEqual(alphabeta.solve(board, table = table), (True, board.pt(1, 5), None))
+        self.assertGreater(len(table), 0)
+
+    def test_parallel_solve(self):
+        board = SimpleGoBoard(3)
+        for row, col in [(1, 1), (2, 2), (3, 3), (1, 3)]:
+            board.play_move_gomoku(board.pt(row, col), board.current_player)
+        self.assertEqual(board.solve(3)[0], board.solve()[0])
+        board = SimpleGoBoard(5)
+        for col in range(1, 5):
+            board.play_move_gomoku(board.pt(1, col), board.current_player)
+            board.play_move_gomoku(board.pt(3, col), board.current_player)
+        self.assertEqual(board.solve(2), ('b', board.pt(1, 5)))
+
+    def test_save_load(self):
+        table = TranspositionTable()
+        table.put(-3, 1, LOWER)
+        table.put(2 ** 62, -1, EXACT)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "table.npy")
+            table.save(path)
+            loaded = TranspositionTable()
+            loaded.load(path)
+        self.assertEqual(loaded.entries, table.entries)
+
+    def test_shared_copies(self):
+        table = TranspositionTable()
+        table.put(-3, 1, LOWER)
+        table.put(10, 0, UPPER)
+        shared = SharedTranspositionTable(size = 64)
+        try:
+            shared.update(table)
+            self.assertEqual(shared.get(-3), (1, LOWER))
+            shared.put(11, -1, EXACT)
+            copy = TranspositionTable()
+            shared.copy_to(copy)
+        finally:
+            shared.close()
+        self.assertEqual(copy.entries, {-3: (1, LOWER), 10: (0, UPPER), 11: (-1, EXACT)})
+
+    def test_resume_after_timeout(self):
+        board = SimpleGoBoard(5)
+        for row, col in [(1, 1), (1, 2), (2, 3), (2, 4), (3, 5),
+                         (3, 1), (4, 2), (4, 3), (5, 4), (3, 3)]:
+            board.play_move_gomoku(board.pt(row, col), board.current_player)
+        expected = alphabeta.solve(board.copy())
+        table = TranspositionTable()
+        picker = MovePicker()
+        calls = 0
+        while True:
+            calls += 1
+            try:
+                result = alphabeta.solve(board.copy(), time.time() + 0.05, table, picker = picker)
+                break
+            except alphabeta.SolverTimeout:
+                pass
+        self.assertGreater(calls, 1)
+        self.assertEqual(result[0], expected[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+transposition.py
+
+Transposition tables for the alphabeta solver.
+
+The solver searches the full game tree with values -1, 0 and 1, so a
+result only depends on the position, never on the depth it was found at.
+An entry holds the value of a position and whether it is exact (EXACT),
+or only a lower (LOWER) or upper (UPPER) bound because the search of the
+position was cut off by its alpha-beta window.
+Positions are keyed by exp_store.position_key, which is the same in
+every process. It hashes the whole board array, whose length depends on
+the board size, so one table can hold the positions of every size.
+
+    TranspositionTable         a dictionary, for one process. It is kept
+                               between solves and can be saved to a file
+                               and loaded again
+    SharedTranspositionTable   a fixed size array in shared memory that
+                               several solver processes read and write
+                               at the same time, see alphabeta.parallel_solve
+
+The shared table has no locks. Each slot holds (key ^ data, data);
+a reader only accepts the slot if this gives back its key, so a slot
+that another process is writing half-way is read as a miss.
+A new entry always replaces the old one in its slot.
+"""
+
+import os
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TranspositionTable(object):
+
+    def __init__(self, max_entries=2000000):
+        """
+        max_entries: the table is cleared when it grows larger
+        """
+        self.max_entries = max_entries
+        self.entries = {}
+
+    def get(self, key):
+        """ (value, flag) stored for key, or None """
+        return self.entries.get(key)
+
+    def put(self, key, value, flag):
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = (value, flag)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def save(self, path):
+        """ Write the entries to path as a numpy array, replacing the file at once """
+        array = np.array([(key, value, flag) for key, (value, flag) in self.entries.items()],
+                         dtype = np.int64).reshape(-1, 3)
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            np.save(f, array)
+        os.replace(temporary, path)
+
+    def load(self, path):
+        """ Add the entries saved in path """
+        array = np.load(path)
+        keys, values, flags = array.T.tolist()
+        self.entries.update(zip(keys, zip(values, flags)))
+
+class SharedTranspositionTable(object):
+
+    def __init__(self, size=1 << 20, name=None):
+        """
+        Create a table of size slots in a new shared memory block,
+        or attach to the block name of an existing table of that size.
+        """
+        self.size = size
+        self.owner = name is None
+        if self.owner:
+            self.memory = SharedMemory(create = True, size = size * 16)
+        else:
+            self.memory = _attach(name)
+        self.slots = np.ndarray((size, 2), dtype = np.int64, buffer = self.memory.buf)
+        if self.owner:
+            self.slots[:] = 0
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def __reduce__(self):
+        # a spawned solver process attaches to the same block
+        return SharedTranspositionTable, (self.size, self.name)
+
+    def get(self, key):
+        check, data = self.slots[key % self.size].tolist()
+        if data == 0 or check ^ data != key:
+            return None
+        return (data & 3) - 2, data >> 2
+
+    def put(self, key, value, flag):
+        data = (value + 2) | (flag << 2)
+        self.slots[key % self.size] = (key ^ data, data)
+
+    def update(self, table):
+        """ Copy the entries of the TranspositionTable table into this table """
+        if len(table) == 0:
+            return
+        keys = np.fromiter(table.entries.keys(), dtype = np.int64, count = len(table))
+        values, flags = np.array(list(table.entries.values()), dtype = np.int64).T
+        data = (values + 2) | (flags << 2)
+        slots = keys % self.size
+        self.slots[slots, 0] = keys ^ data
+        self.slots[slots, 1] = data
+
+    def copy_to(self, table):
+        """ Add the entries of this table to the TranspositionTable table """
+        check, data = self.slots[self.slots[:, 1] != 0].T
+        keys = (check ^ data).tolist()
+        table.entries.update(zip(keys, zip(((data & 3) - 2).tolist(), (data >> 2).tolist())))
+
+    def close(self):
+        """ Detach from the block, the owner also frees it """
+        self.slots = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+def _attach(name):
+    try:
+        return SharedMemory(name = name, track = False)
+    except TypeError:
+        # before Python 3.13 attaching registers the block with the
+        # resource tracker, which would free it when this process ends
+        memory = SharedMemory(name = name)
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
@@ -0,0 +1,279 @@
+"""
+tournament.py
+
+Parallel match runner for two GTP Gomoku players.
+
+Games are scheduled on a process pool. Every worker starts one persistent
+process per player and resets it with clear_board between games. Each
+engine process has its own experience store in a temporary directory,
+so the engines do not share what they learn. An engine that does not
+answer within the time limit, or fails, loses the game and is restarted.
+Games are adjudicated in-process with SimpleGoBoard instead of a
+referee GTP process. Prints the win rate of player 1 and the Elo
+difference with confidence intervals.
+
+Usage:
+    python3 tournament.py --games 100 --workers 4 --timelimit 10
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import select
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "gomoku4"))
+
+from board_util import GoBoardUtil, BLACK, WHITE, coord_to_point
+from simple_board import SimpleGoBoard
+from gtp_connection import move_to_coord
+
+player1 = 'flat_mc_player/Gomoku3.py'
+player2 = 'gomoku4/Gomoku4.py'
+
+class GtpEngine(object):
+    """
+    A persistent GTP engine process.
+    """
+    def __init__(self, path, env=None):
+        self.path = path
+        self.env = env
+        self.start()
+
+    def start(self):
+        self.process = subprocess.Popen([sys.executable, os.path.join(HERE, self.path)],
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, cwd=HERE, env=self.env)
+        self.buffer = b''
+
+    def restart(self):
+        self.process.kill()
+        self.process.wait()
+        self.start()
+
+    def send(self, command, timeout=None):
+        """
+        Send a command and return the response without the leading '= '.
+        Returns None if there was no response within timeout seconds.
+        Raises RuntimeError on a GTP error response.
+        """
+        self.process.stdin.write((command + '\n').encode())
+        self.process.stdin.flush()
+        deadline = None if timeout is None else time.time() + timeout
+        fd = self.process.stdout.fileno()
+        while b'\n\n' not in self.buffer:
+            wait = None if deadline is None else max(0, deadline - time.time())
+            if not select.select([fd], [], [], wait)[0]:
+                return None
+            data = os.read(fd, 4096)
+            if not data:
+                raise RuntimeError("{} exited".format(self.path))
+            self.buffer += data
+        response, self.buffer = self.buffer.split(b'\n\n', 1)
+        response = response.decode().strip()
+        if response.startswith('?'):
+            raise RuntimeError("{}: {} -> {}".format(self.path, command, response))
+        return response[1:].strip()
+
+    def close(self):
+        self.process.kill()
+        self.process.wait()
+
+"""
+Worker process side: the two engines of this worker.
+"""
+_engines = None
+
+class Forfeit(Exception):
+    """ engine lost the game, because it timed out or failed """
+
+    def __init__(self, engine, timed_out):
+        Exception.__init__(self, engine.path)
+        self.engine = engine
+        self.timed_out = timed_out
+
+def _setup(engine, size, timelimit):
+    engine.send('boardsize {}'.format(size))
+    engine.send('timelimit {}'.format(timelimit))
+
+def _init_worker(paths, size, timelimit, store_dir):
+    global _engines
+    _engines = []
+    for i, path in enumerate(paths):
+        store = os.path.join(store_dir, "exp-{}-{}.db".format(os.getpid(), i))
+        _engines.append(GtpEngine(path, dict(os.environ, GOMOKU_EXP_DB=store)))
+    for engine in _engines:
+        _setup(engine, size, timelimit)
+
+def _send_move_command(engine, command, size, timelimit):
+    """
+    Send a genmove or play command, which must be answered within the
+    time limit. Otherwise the engine is restarted and Forfeit raised.
+    """
+    try:
+        response = engine.send(command, timeout=timelimit + 1)
+        if response is not None:
+            return response
+        timed_out = True
+    except RuntimeError:
+        timed_out = False
+    engine.restart()
+    _setup(engine, size, timelimit)
+    raise Forfeit(engine, timed_out)
+
+def play_game(game):
+    """
+    Play one game. game is (game index, swapped, size, timelimit);
+    if swapped, player 2 plays black.
+    Returns (game index, swapped, result, timed out),
+    result is 1 if player 1 wins, 2 if player 2 wins and 0 for a draw.
+    An engine that times out or fails on genmove or play loses.
+    """
+    index, swapped, size, timelimit = game
+    players = [_engines[1], _engines[0]] if swapped else list(_engines)
+    for engine in players:
+        engine.send('clear_board')
+    board = SimpleGoBoard(size)
+    colors = [BLACK, WHITE]
+    winner, timed_out = None, False
+    turn = 0
+    while winner is None:
+        color = colors[turn]
+        color_str = 'b' if color == BLACK else 'w'
+        mover, other = players[turn], players[1 - turn]
+        try:
+            response = _send_move_command(mover, 'genmove ' + color_str, size, timelimit)
+        except Forfeit as forfeit:
+            timed_out = forfeit.timed_out
+            winner = GoBoardUtil.opponent(color)
+            break
+        if response == 'resign':
+            winner = GoBoardUtil.opponent(color)
+            break
+        if response == 'pass':
+            winner = 'draw' if len(board.get_empty_points()) == 0 \
+                     else GoBoardUtil.opponent(color)
+            break
+        try:
+            row, col = move_to_coord(response, size)
+        except ValueError:
+            winner = GoBoardUtil.opponent(color)
+            break
+        point = coord_to_point(row, col, size)
+        if not board.play_move_gomoku(point, color):
+            winner = GoBoardUtil.opponent(color)
+            break
+        try:
+            _send_move_command(other, 'play {} {}'.format(color_str, response),
+                               size, timelimit)
+        except Forfeit as forfeit:
+            timed_out = forfeit.timed_out
+            winner = color
+            break
+        if board.point_check_game_end_gomoku(point):
+            winner = color
+        elif len(board.get_empty_points()) == 0:
+            winner = 'draw'
+        turn = 1 - turn
+    if winner == 'draw':
+        result = 0
+    else:
+        black_player = 2 if swapped else 1
+        result = black_player if winner == BLACK else 3 - black_player
+    return index, swapped, result, timed_out
+
+def score_interval(wins, losses, draws, z=1.96):
+    """
+    Score of player 1 (draws count half) with a normal approximation
+    confidence interval. Returns (score, low, high).
+    """
+    n = wins + losses + draws
+    if n == 0:
+        return 0.5, 0.0, 1.0
+    score = (wins + 0.5 * draws) / n
+    variance = (wins * (1 - score) ** 2 + losses * score ** 2
+                + draws * (0.5 - score) ** 2) / n
+    margin = z * math.sqrt(variance / n)
+    return score, max(0.0, score - margin), min(1.0, score + margin)
+
+def elo(score):
+    """ Elo difference for an expected score, +-inf at 0 and 1 """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+def json_summary(summary):
+    """ summary with the infinite Elo values as None, which JSON has as null """
+    finite = lambda value: None if math.isinf(value) else value
+    summary = dict(summary)
+    summary["elo"] = finite(summary["elo"])
+    summary["elo 95%"] = [finite(value) for value in summary["elo 95%"]]
+    return summary
+
+def run_match(num_games=10, workers=None, size=7, timelimit=60,
+              paths=(player1, player2), verbose=True):
+    """
+    Play num_games games, half of them with player 2 as black.
+    Returns a summary dictionary.
+    """
+    games = [(i, i >= num_games / 2, size, timelimit) for i in range(num_games)]
+    wins = losses = draws = timeouts = 0
+    start = time.time()
+    with tempfile.TemporaryDirectory() as store_dir, \
+         multiprocessing.Pool(workers, initializer=_init_worker,
+                              initargs=(list(paths), size, timelimit, store_dir)) as pool:
+        for index, swapped, result, timed_out in pool.imap_unordered(play_game, games):
+            timeouts += timed_out
+            if result == 1:
+                wins += 1
+            elif result == 2:
+                losses += 1
+            else:
+                draws += 1
+            if verbose:
+                print('game', index, 'swapped' if swapped else '', 'result', result,
+                      'timeout' if timed_out else '', flush=True)
+    score, low, high = score_interval(wins, losses, draws)
+    return {"player1": paths[0], "player2": paths[1], "games": num_games,
+            "player1 wins": wins, "player2 wins": losses, "draws": draws,
+            "timeouts": timeouts, "score": score, "score 95%": [low, high],
+            "elo": elo(score), "elo 95%": [elo(low), elo(high)],
+            "seconds": time.time() - start}
+
+def output_result(summary):
+    print('player1 win', summary["player1 wins"], 'player2 win', summary["player2 wins"],
+          'draw', summary["draws"], 'timeouts', summary["timeouts"])
+    print('player1 score {:.3f} [{:.3f}, {:.3f}]'.format(summary["score"],
+                                                        *summary["score 95%"]))
+    print('player1 elo {:+.0f} [{:+.0f}, {:+.0f}]'.format(summary["elo"],
+                                                         *summary["elo 95%"]))
+    print('{} games in {:.0f} s'.format(summary["games"], summary["seconds"]))
+
+def run():
+    parser = argparse.ArgumentParser(description="Parallel Gomoku match runner")
+    parser.add_argument("--player1", default=player1)
+    parser.add_argument("--player2", default=player2)
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="parallel games, default is the number of CPUs")
+    parser.add_argument("--size", type=int, default=7)
+    parser.add_argument("--timelimit", type=int, default=60)
+    parser.add_argument("--json", default=None, help="also write the summary to this file")
+    args = parser.parse_args()
+    summary = run_match(args.games, args.workers, args.size, args.timelimit,
+                        (args.player1, args.player2))
+    output_result(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(json_summary(summary), f, indent=2, allow_nan=False)
+
+if __name__=='__main__':
+    run()